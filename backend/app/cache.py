@@ -0,0 +1,382 @@
+# app/cache.py
+"""
+Cache backends with a common async interface.
+
+- MemoryCache: in-process LRU. Fastest, but every worker has its own copy.
+- SQLiteCache: an on-disk store shared by all workers on the host.
+- RedisCache: networked, shared across hosts. Any redis.asyncio-compatible
+  client works, so tests can pass a local stand-in such as fakeredis.
+- TieredCache: a MemoryCache in front of a shared backend. It drops local
+  entries when another worker broadcasts an invalidation.
+
+Every backend supports per-entry TTLs, a size bound, invalidation broadcast
+and hit/miss statistics. Shared backends store values as JSON rather than
+pickles, so whoever can write to the store cannot run code in the app.
+Use get_cache(namespace) rather than building backends directly.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from .config import settings
+
+LOG = logging.getLogger("cache")
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "sets", "evictions", "invalidations")
+
+    def __init__(self):
+        self.hits = self.misses = self.sets = self.evictions = self.invalidations = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class Cache:
+    """Interface shared by every backend. Keys are strings; values are JSON-serializable."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def invalidate(self, key: str) -> None:
+        """Remove `key` here and tell every other worker sharing this cache to drop it."""
+        raise NotImplementedError
+
+    async def invalidations_since(self, cursor: int) -> Tuple[int, List[str]]:
+        """Keys invalidated after `cursor`, and the new cursor. Local-only backends return nothing."""
+        return cursor, []
+
+    def describe(self) -> dict:
+        return {"backend": type(self).__name__, **self.stats.as_dict()}
+
+
+class MemoryCache(Cache):
+    def __init__(self, max_entries: int, default_ttl: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key):
+        return self.get_nowait(key)
+
+    def get_nowait(self, key):
+        entry = self._data.get(key)
+        if entry is None or (entry[0] and entry[0] < time.monotonic()):
+            if entry is not None:
+                del self._data[key]
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    async def set(self, key, value, ttl=None):
+        self.set_nowait(key, value, ttl)
+
+    def set_nowait(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        self._data[key] = (time.monotonic() + ttl if ttl else 0.0, value)
+        self._data.move_to_end(key)
+        self.stats.sets += 1
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def invalidate(self, key):
+        self.discard(key)
+
+    def discard(self, key):
+        if self._data.pop(key, None) is not None:
+            self.stats.invalidations += 1
+
+    def describe(self):
+        return {**super().describe(), "entries": len(self._data), "max_entries": self.max_entries}
+
+
+class SQLiteCache(Cache):
+    """
+    Host-local cache in a SQLite file opened by every worker. Invalidations are
+    appended to a log table so tiered caches in other workers can drop their copies.
+    SQLite calls block (up to the busy timeout while another worker holds the
+    write lock), so they run in a thread, one at a time per connection.
+    """
+    # Checking the row count on every set would cost a full scan.
+    _TRIM_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int, default_ttl: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._sets_since_trim = 0
+        self._entries: Optional[int] = None
+        path = os.path.expanduser(path)
+        # Keep the file in a directory only the app can write to (not /tmp).
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at_idx ON cache (stored_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS invalidations (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL)")
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn, *args):
+        with self._lock:
+            return fn(*args)
+
+    def _get(self, key):
+        return self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+
+    async def get(self, key):
+        row = await self._run(self._get, key)
+        if row is None or (row[1] and row[1] < time.time()):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def _set(self, key, encoded, expires_at, now, trim):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+            (key, encoded, expires_at, now),
+        )
+        if trim:
+            self._trim(now)
+
+    async def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.time()
+        self._sets_since_trim += 1
+        trim = self._sets_since_trim >= self._TRIM_EVERY
+        if trim:
+            self._sets_since_trim = 0
+        await self._run(self._set, key, json.dumps(value), now + ttl if ttl else None, now, trim)
+        self.stats.sets += 1
+
+    def _trim(self, now: float):
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored_at LIMIT ?)", (excess,)
+            )
+            self.stats.evictions += excess
+        self._entries = min(count, self.max_entries)
+        # Keep the invalidation log short; readers only need recent entries.
+        self._conn.execute("DELETE FROM invalidations WHERE id <= (SELECT MAX(id) FROM invalidations) - 10000")
+
+    def _invalidate(self, key):
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._conn.execute("INSERT INTO invalidations (key) VALUES (?)", (key,))
+
+    async def invalidate(self, key):
+        await self._run(self._invalidate, key)
+        self.stats.invalidations += 1
+
+    def _invalidations_since(self, cursor):
+        return self._conn.execute("SELECT id, key FROM invalidations WHERE id > ? ORDER BY id", (cursor,)).fetchall()
+
+    async def invalidations_since(self, cursor):
+        rows = await self._run(self._invalidations_since, cursor)
+        return (rows[-1][0] if rows else cursor), [key for _, key in rows]
+
+    def describe(self):
+        # Row count as of the last trim; counting here would block the event loop.
+        return {**super().describe(), "entries": self._entries, "max_entries": self.max_entries}
+
+
+class RedisCache(Cache):
+    """
+    Networked cache. The size bound is enforced by Redis itself (maxmemory with
+    an LRU policy). Invalidations go to a capped list so tiered caches can replay them.
+    """
+    _LOG_KEY = "cache:invalidations"
+    _SEQ_KEY = "cache:invalidations:seq"
+    _LOG_LENGTH = 10000
+
+    def __init__(self, client, default_ttl: Optional[float] = None):
+        super().__init__()
+        self.client = client
+        self.default_ttl = default_ttl
+
+    async def get(self, key):
+        raw = await self.client.get(key)
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        await self.client.set(key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+        self.stats.sets += 1
+
+    async def invalidate(self, key):
+        seq = await self.client.incr(self._SEQ_KEY)
+        await self.client.delete(key)
+        await self.client.lpush(self._LOG_KEY, f"{seq}:{key}")
+        await self.client.ltrim(self._LOG_KEY, 0, self._LOG_LENGTH - 1)
+        self.stats.invalidations += 1
+
+    async def invalidations_since(self, cursor):
+        entries = await self.client.lrange(self._LOG_KEY, 0, self._LOG_LENGTH - 1)
+        keys, newest = [], cursor
+        for entry in entries:
+            seq, key = (entry.decode() if isinstance(entry, bytes) else entry).split(":", 1)
+            seq = int(seq)
+            if seq <= cursor:
+                break  # newest first
+            newest = max(newest, seq)
+            keys.append(key)
+        return newest, keys
+
+
+class TieredCache(Cache):
+    """
+    Serves hits from a per-worker MemoryCache and falls back to a shared backend.
+    The shared invalidation log is polled at most every `sync_interval` seconds,
+    so a stale local copy is never served for longer than that.
+    """
+
+    def __init__(self, local: MemoryCache, shared: Cache, sync_interval: float = 1.0):
+        super().__init__()
+        self.local = local
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self._cursor = 0
+        self._synced_at = 0.0
+        self._sync_lock = asyncio.Lock()
+
+    async def _sync(self):
+        if time.monotonic() - self._synced_at < self.sync_interval or self._sync_lock.locked():
+            return
+        async with self._sync_lock:
+            first_sync = self._synced_at == 0.0
+            self._cursor, keys = await self.shared.invalidations_since(self._cursor)
+            self._synced_at = time.monotonic()
+            if not first_sync:
+                for key in keys:
+                    self.local.discard(key)
+
+    async def get(self, key):
+        await self._sync()
+        value = self.local.get_nowait(key)
+        if value is None:
+            value = await self.shared.get(key)
+            if value is not None:
+                self.local.set_nowait(key, value)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key, value, ttl=None):
+        self.local.set_nowait(key, value, ttl)
+        await self.shared.set(key, value, ttl)
+        self.stats.sets += 1
+
+    async def invalidate(self, key):
+        self.local.discard(key)
+        await self.shared.invalidate(key)
+        self.stats.invalidations += 1
+
+    def describe(self):
+        return {**super().describe(), "local": self.local.describe(), "shared": self.shared.describe()}
+
+
+class NamespacedCache:
+    """A view onto a shared backend that prefixes every key with `namespace:`."""
+
+    def __init__(self, namespace: str, backend: Cache, default_ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.backend = backend
+        self.default_ttl = default_ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str):
+        return await self.backend.get(self._key(key))
+
+    async def set(self, key: str, value, ttl: Optional[float] = None):
+        await self.backend.set(self._key(key), value, ttl if ttl is not None else self.default_ttl)
+
+    async def invalidate(self, key: str):
+        await self.backend.invalidate(self._key(key))
+
+
+def _build_backend() -> Cache:
+    backend = settings.CACHE_BACKEND
+    ttl = settings.CACHE_DEFAULT_TTL_SECONDS
+    if backend == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, ttl)
+    local = MemoryCache(settings.CACHE_LOCAL_MAX_ENTRIES, ttl)
+    if backend == "sqlite":
+        shared = SQLiteCache(settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES, ttl)
+    elif backend == "redis":
+        # Optional dependency: only needed when the networked backend is selected.
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        shared = RedisCache(redis.from_url(settings.CACHE_URL), ttl)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+    return TieredCache(local, shared, settings.CACHE_SYNC_INTERVAL_SECONDS)
+
+
+_backend: Optional[Cache] = None
+
+
+def set_cache_backend(backend: Optional[Cache]) -> None:
+    """Swap the process-wide backend, e.g. a RedisCache around a local stand-in in tests."""
+    global _backend
+    _backend = backend
+
+
+def get_cache_backend() -> Cache:
+    global _backend
+    if _backend is None:
+        _backend = _build_backend()
+    return _backend
+
+
+def get_cache(namespace: str, default_ttl: Optional[float] = None) -> NamespacedCache:
+    """
+    Returns a namespaced view of the process-wide backend. The backend is
+    resolved on each call, so call this at use time rather than at import.
+    """
+    return NamespacedCache(namespace, get_cache_backend(), default_ttl)
+
+
+def cache_metrics() -> Dict[str, dict]:
+    return get_cache_backend().describe() if _backend is not None else {}
@@ -1,6 +1,6 @@
 # app/config.py
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv() # Explicitly load the .env file to be safe
@@ -12,7 +12,66 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 60
     CORS_ORIGINS: str = ""
-    GEMINI_API_KEY: str # <-- This now correctly includes your key
+    # Optional at startup: the AI client is only built on first use.
+    GEMINI_API_KEY: Optional[str] = None
+
+    # Admission control for AI-backed endpoints (per operation)
+    AI_RATE_PER_MINUTE: float = 6.0
+    AI_BURST: int = 3
+    AI_MAX_CONCURRENCY: int = 8
+    AI_MAX_QUEUE: int = 16
+    AI_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Live event streams: "memory" (single worker) or "redis" (fan-out across workers)
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_URL: str = "redis://localhost:6379/0"
+    EVENTS_REPLAY_SIZE: int = 100
+    EVENTS_BUFFER_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Meal-plan retention: plans expire MEAL_PLAN_TTL_SECONDS after they are written,
+    # but with MEAL_PLAN_KEEP_UNTIL_WEEK_END never before their week is over
+    MEAL_PLAN_TTL_SECONDS: int = 86400
+    MEAL_PLAN_KEEP_UNTIL_WEEK_END: bool = True
+
+    # Off-peak pre-generation of next week's meal plans (UTC hours; the window may wrap midnight)
+    PREGEN_ENABLED: bool = True
+    PREGEN_WINDOW_START_HOUR: int = 1
+    PREGEN_WINDOW_END_HOUR: int = 5
+    PREGEN_LEAD_DAYS: int = 2
+    PREGEN_ACTIVE_DAYS: int = 14
+    PREGEN_CONCURRENCY: int = 2
+    PREGEN_RATE_PER_MINUTE: float = 30.0
+    PREGEN_CHECK_INTERVAL_SECONDS: float = 600
+    PREGEN_LEASE_SECONDS: int = 3600
+
+    # Hot/cold tiering: meals and daily logs older than ARCHIVE_AFTER_DAYS move to *_archive collections
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 180
+    ARCHIVE_BLOCK_COMPRESSOR: str = "zstd"
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_CHECK_INTERVAL_SECONDS: float = 3600
+
+    # Delta sync: tombstones for deletes are kept this long; older GET /sync tokens start over
+    SYNC_TOMBSTONE_TTL_DAYS: int = 90
+
+    # Opt-in request profiling: "X-Profile: <PROFILING_TOKEN>" or a random sample of requests
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_FLAMEGRAPH_DIR: Optional[str] = None
+
+    # Upper bound on the pantry section of meal-plan prompts, in estimated tokens
+    PROMPT_PANTRY_TOKEN_BUDGET: int = 200
+
+    # Cache backend: "memory" (per worker), "sqlite" (shared by workers on a host) or "redis"
+    CACHE_BACKEND: str = "memory"
+    CACHE_PATH: str = "~/.cache/health_app/cache.sqlite3"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_LOCAL_MAX_ENTRIES: int = 1000
+    CACHE_DEFAULT_TTL_SECONDS: float = 3600
+    CACHE_SYNC_INTERVAL_SECONDS: float = 1.0
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .profiling import CommandTimer
 
 
-client = AsyncIOMotorClient(settings.MONGO_URI)
+# The listener times commands for profiled requests only (see app/profiling.py).
+client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=[CommandTimer()])
 db = client[settings.MONGO_DB]
\ No newline at end of file
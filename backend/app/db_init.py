@@ -1,14 +1,69 @@
 # app/db_init.py
 import logging
 from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+from .config import settings
 from .db import db
+from .services.archive import ensure_archive_collections
+from .sync import SYNC_COLLECTIONS, TOMBSTONES_COLLECTION
 
 LOG = logging.getLogger("db_init")
 
+# Flipped once create_indexes() has finished; exposed through GET /ready.
+indexes_ready = False
+
+async def ensure_activity_timeseries():
+    """
+    Create `activity` as a time-series collection bucketed per user. Awaited at
+    startup, before requests are served. An existing regular collection must
+    be converted with scripts/migrate.py (migration 0002).
+    """
+    options = await db.activity.options()
+    if "timeseries" in options:
+        return
+    existing = await db.list_collection_names(filter={"name": "activity"})
+    if existing:
+        LOG.warning("'activity' is a regular collection; run scripts/migrate.py 0002")
+        return
+    try:
+        await db.create_collection(
+            "activity",
+            timeseries={"timeField": "createdAt", "metaField": "user_id", "granularity": "minutes"},
+        )
+    except CollectionInvalid:
+        # Another worker created it first.
+        pass
+
+
+async def drop_index_if_exists(collection, name: str):
+    """Drop an index that a newer definition replaces."""
+    if name not in await collection.index_information():
+        return
+    try:
+        await collection.drop_index(name)
+    except OperationFailure:
+        # Another worker dropped it first.
+        pass
+
+
+async def ensure_meal_plans_ttl():
+    """
+    Replace the old fixed 24h TTL on `createdAt` with a per-document TTL on
+    `expiresAt`. Plans written before the switch get `expiresAt` from
+    scripts/migrate.py (migration 0004); until then they do not expire.
+    """
+    await drop_index_if_exists(db.meal_plans, "meal_plans_ttl_idx")
+    await db.meal_plans.create_index(
+        [("expiresAt", ASCENDING)],
+        name="meal_plans_expiresAt_ttl_idx",
+        expireAfterSeconds=0,
+    )
+
+
 async def create_indexes():
     """
     Create all required indexes for the app.
-    Call this from app.on_event("startup").
+    Call this through ensure_indexes_in_background() from app.on_event("startup").
     """
     LOG.info("Ensuring MongoDB indexes...")
 
@@ -27,18 +82,29 @@ async def create_indexes():
         [("user_id", ASCENDING), ("date", DESCENDING)], name="daily_logs_user_date_desc_idx"
     )
 
-    # --- TTL Index for generated Meal Plans ---
-    # This collection will store AI-generated plans temporarily.
-    # Documents will be automatically deleted after 24 hours (86400 seconds).
-    await db.meal_plans.create_index(
-        [("createdAt", ASCENDING)],
-        name="meal_plans_ttl_idx",
-        expireAfterSeconds=86400
+    # Meals - today's meals and the distinct recent meals behind GET /meals/recent
+    await db.meals.create_index(
+        [("user_id", ASCENDING), ("createdAt", DESCENDING)], name="meals_user_createdAt_desc_idx"
     )
-    # Index for fetching a user's meal plan
+
+    # Archival - the job scans hot meals and daily logs by age across all users
+    await db.meals.create_index([("createdAt", ASCENDING)], name="meals_createdAt_idx")
+    await db.daily_logs.create_index([("date", ASCENDING)], name="daily_logs_date_idx")
+    await ensure_archive_collections()
+
+    # --- TTL Index for generated Meal Plans ---
+    # Each plan carries its own `expiresAt` (see meal_plan_service.plan_expires_at),
+    # so pre-generated plans can outlive the default 24 hours until their week ends.
+    await ensure_meal_plans_ttl()
+    # Meal plans are read and upserted per (user_id, weekStart); the compound
+    # index also serves user_id-only lookups, so it replaces meal_plans_user_idx.
     await db.meal_plans.create_index(
-        [("user_id", ASCENDING)], name="meal_plans_user_idx"
+        [("user_id", ASCENDING), ("weekStart", ASCENDING)], name="meal_plans_user_weekStart_idx"
     )
+    await drop_index_if_exists(db.meal_plans, "meal_plans_user_idx")
+
+    # Goals - one document per user, read on every dashboard and AI request
+    await db.goals.create_index([("user_id", ASCENDING)], name="goals_user_idx")
 
     # Grocery / pantry - ensures no duplicate items per user
     await db.grocery.create_index(
@@ -46,5 +112,49 @@ async def create_indexes():
         unique=True,
         name="grocery_user_name_idx",
     )
+    # Grocery / pantry - lookups by canonical ingredient id (see services/ingredients.py)
+    await db.grocery.create_index(
+        [("user_id", ASCENDING), ("food_id", ASCENDING)], name="grocery_user_food_id_idx"
+    )
+    # Grocery / pantry - the whole pantry, most recently added first (load_pantry)
+    await db.grocery.create_index(
+        [("user_id", ASCENDING), ("createdAt", DESCENDING)], name="grocery_user_createdAt_desc_idx"
+    )
+    # Grocery / pantry - one list ("in_stock" / "to_buy"), most recently added first
+    await db.grocery.create_index(
+        [("user_id", ASCENDING), ("status", ASCENDING), ("createdAt", DESCENDING)],
+        name="grocery_user_status_createdAt_desc_idx",
+    )
+
+    # Activity - range queries and daily aggregation per user
+    await db.activity.create_index(
+        [("user_id", ASCENDING), ("createdAt", ASCENDING)], name="activity_user_createdAt_idx"
+    )
+
+    # Delta sync - changes after a client's last seq (GET /sync), per collection
+    for name in SYNC_COLLECTIONS:
+        await db[name].create_index([("user_id", ASCENDING), ("seq", ASCENDING)], name=f"{name}_user_seq_idx")
+    await db[TOMBSTONES_COLLECTION].create_index(
+        [("user_id", ASCENDING), ("seq", ASCENDING)], name="tombstones_user_seq_idx"
+    )
+    # Tokens older than this are reset anyway, so their tombstones can go
+    await db[TOMBSTONES_COLLECTION].create_index(
+        [("deletedAt", ASCENDING)],
+        name="tombstones_deletedAt_ttl_idx",
+        expireAfterSeconds=settings.SYNC_TOMBSTONE_TTL_DAYS * 86400,
+    )
 
     LOG.info("✅ All indexes ensured successfully.")
+
+
+async def ensure_indexes_in_background():
+    """
+    Runs create_indexes() without gating startup and flips `indexes_ready`
+    when it finishes. Failures are logged; the readiness flag stays False.
+    """
+    global indexes_ready
+    try:
+        await create_indexes()
+        indexes_ready = True
+    except Exception:
+        LOG.exception("Index creation failed")
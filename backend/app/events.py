@@ -0,0 +1,218 @@
+# app/events.py
+"""
+Per-user event bus behind GET /events/stream.
+
+Write paths publish small delta events ("daily_totals", "pantry_item",
+"weight"). Every connected stream of that user receives them. Event ids
+increase per user. A short replay log per user lets a reconnecting client
+pass Last-Event-ID and receive what it missed.
+
+- MemoryEventBackend: fan-out inside one worker. With several workers,
+  events only reach streams on the worker that handled the write (see
+  check_event_backend()); clients apply their own writes from responses.
+- RedisEventBackend: fan-out across workers. Ids and the replay log live in
+  Redis and events are delivered through pub/sub.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set
+from .config import settings
+
+LOG = logging.getLogger("events")
+
+# Sent in place of the dropped events when a connection falls too far behind.
+RESYNC = {"type": "resync", "data": {}}
+
+
+class Subscription:
+    """One open stream. The buffer is bounded; a slow consumer gets a resync instead of unbounded growth."""
+
+    def __init__(self, user_id: str, buffer_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+
+    def deliver(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBackend:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def _deliver_local(self, user_id: str, event: dict):
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.deliver(event)
+
+    def add_subscriber(self, subscription: Subscription):
+        self._subscribers.setdefault(subscription.user_id, set()).add(subscription)
+
+    def remove_subscriber(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def connection_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    async def publish(self, user_id: str, event_type: str, data: dict) -> None:
+        raise NotImplementedError
+
+    async def replay(self, user_id: str, after_id: int) -> List[dict]:
+        raise NotImplementedError
+
+
+class MemoryEventBackend(EventBackend):
+    # Replay logs are kept for at most this many users, least recently active dropped first.
+    MAX_USERS = 10_000
+
+    def __init__(self, replay_size: int):
+        super().__init__()
+        self.replay_size = replay_size
+        self._logs: "OrderedDict[str, Deque[dict]]" = OrderedDict()
+        self._next_id: Dict[str, int] = {}
+        # Ids start at a random per-process offset, so a Last-Event-ID issued by
+        # another worker or before a restart is recognized as foreign.
+        self._base = secrets.randbelow(2 ** 32) << 20
+
+    async def publish(self, user_id, event_type, data):
+        event_id = self._next_id.get(user_id, self._base) + 1
+        self._next_id[user_id] = event_id
+        event = {"id": event_id, "type": event_type, "data": data}
+        log = self._logs.get(user_id)
+        if log is None:
+            log = self._logs[user_id] = deque(maxlen=self.replay_size)
+            if len(self._logs) > self.MAX_USERS:
+                dropped, _ = self._logs.popitem(last=False)
+                self._next_id.pop(dropped, None)
+        self._logs.move_to_end(user_id)
+        log.append(event)
+        self._deliver_local(user_id, event)
+
+    async def replay(self, user_id, after_id):
+        log = self._logs.get(user_id, ())
+        if not self._base <= after_id <= self._next_id.get(user_id, self._base):
+            # Ids from before a restart (or another worker); they mean nothing here.
+            return [RESYNC]
+        if log and after_id < log[0]["id"] - 1:
+            # The client missed more than the log holds.
+            return [RESYNC]
+        return [event for event in log if event["id"] > after_id]
+
+
+class RedisEventBackend(EventBackend):
+    CHANNEL = "events"
+
+    def __init__(self, client, replay_size: int):
+        super().__init__()
+        self.client = client
+        self.replay_size = replay_size
+        self._listener: Optional[asyncio.Task] = None
+
+    def add_subscriber(self, subscription):
+        super().add_subscriber(subscription)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                payload = json.loads(message["data"])
+                self._deliver_local(payload["user_id"], payload["event"])
+            except (ValueError, KeyError):
+                LOG.warning("Dropping malformed event message")
+
+    async def publish(self, user_id, event_type, data):
+        event_id = await self.client.incr(f"events:seq:{user_id}")
+        event = {"id": event_id, "type": event_type, "data": data}
+        log_key = f"events:log:{user_id}"
+        encoded = json.dumps(event, default=str)
+        await self.client.rpush(log_key, encoded)
+        await self.client.ltrim(log_key, -self.replay_size, -1)
+        await self.client.publish(self.CHANNEL, json.dumps({"user_id": user_id, "event": json.loads(encoded)}))
+
+    async def replay(self, user_id, after_id):
+        entries = [json.loads(raw) for raw in await self.client.lrange(f"events:log:{user_id}", 0, -1)]
+        if after_id > int(await self.client.get(f"events:seq:{user_id}") or 0):
+            return [RESYNC]
+        if entries and after_id < entries[0]["id"] - 1:
+            return [RESYNC]
+        return [event for event in entries if event["id"] > after_id]
+
+
+_backend: Optional[EventBackend] = None
+
+
+def check_event_backend() -> None:
+    """
+    Called at startup. Live events are best effort: with several workers the
+    memory backend still runs, delivering only to streams on the same worker,
+    and this logs a warning recommending EVENTS_BACKEND=redis.
+    """
+    if settings.EVENTS_BACKEND != "memory":
+        return
+    workers = os.environ.get("WEB_CONCURRENCY", "1")
+    several = workers.isdigit() and int(workers) > 1
+    if several or multiprocessing.parent_process() is not None or "gunicorn" in os.environ.get("SERVER_SOFTWARE", ""):
+        LOG.warning(
+            "EVENTS_BACKEND=memory with a multi-process server: events only reach streams on the same worker; "
+            "use EVENTS_BACKEND=redis for cross-worker delivery"
+        )
+
+
+def set_event_backend(backend: Optional[EventBackend]) -> None:
+    global _backend
+    _backend = backend
+
+
+def get_event_backend() -> EventBackend:
+    global _backend
+    if _backend is None:
+        if settings.EVENTS_BACKEND == "memory":
+            _backend = MemoryEventBackend(settings.EVENTS_REPLAY_SIZE)
+        elif settings.EVENTS_BACKEND == "redis":
+            # Optional dependency: only needed when the multi-worker backend is selected.
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("EVENTS_BACKEND=redis requires the 'redis' package") from e
+            _backend = RedisEventBackend(redis.from_url(settings.EVENTS_URL), settings.EVENTS_REPLAY_SIZE)
+        else:
+            raise ValueError(f"Unknown EVENTS_BACKEND: {settings.EVENTS_BACKEND!r}")
+    return _backend
+
+
+async def publish(user_id, event_type: str, data: dict) -> None:
+    """
+    Publish a delta event to every open stream of `user_id`. Failures are
+    logged and swallowed: a missed event must never fail the write that caused it.
+    """
+    try:
+        await get_event_backend().publish(str(user_id), event_type, data)
+    except Exception:
+        LOG.exception("Failed to publish %s event", event_type)
+
+
+def events_metrics() -> dict:
+    return {"connections": _backend.connection_count()} if _backend is not None else {}
@@ -1,18 +1,31 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from .config import cors_origins_list
+from .config import cors_origins_list, settings
 # CORRECTED: Ensure all routers, including meal_plans, are imported.
-from .routes import auth, meals, weights, daily, grocery, goal, activity, meal_plans
-from .db_init import create_indexes
+from .routes import auth, meals, weights, daily, grocery, goal, activity, meal_plans, dashboard, export, bulk_import, events, sync
+from . import db_init
+from .cache import cache_metrics
+from .events import check_event_backend, events_metrics
+from .services.admission import admission_metrics
+from .services.ai_service import ai_usage_metrics
+from .services import archive, pregeneration
+from .profiling import ProfiledJSONResponse, ProfilingMiddleware
 
 app = FastAPI(
     title="Health App Backend 🚀",
     description="Backend service for health tracking, meals, and nutrition AI-powered analysis.",
     version="1.0.0",
+    default_response_class=ProfiledJSONResponse,
 )
 
+# Compress list responses; small bodies and 304s are not worth the CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
 origins = cors_origins_list()
 if origins:
     app.add_middleware(
@@ -21,16 +34,54 @@ if origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing"],
     )
 
+# Outermost, so `total` in Server-Timing covers CORS and compression as well.
+app.add_middleware(ProfilingMiddleware)
+
 @app.on_event("startup")
 async def on_startup():
-    await create_indexes()
+    check_event_backend()
+    # Awaited, not backgrounded: the first POST /activity would otherwise create
+    # `activity` as a regular collection, and it would stay one.
+    await db_init.ensure_activity_timeseries()
+    # Index creation runs in the background so the worker starts serving immediately.
+    # Keep a reference to the task so it is not garbage collected mid-flight.
+    app.state.index_task = asyncio.create_task(db_init.ensure_indexes_in_background())
+    if settings.PREGEN_ENABLED:
+        app.state.pregeneration_task = asyncio.create_task(pregeneration.scheduler_loop())
+    if settings.ARCHIVE_ENABLED:
+        app.state.archive_task = asyncio.create_task(archive.archive_loop())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    for name in ("pregeneration_task", "archive_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
 
 @app.get("/")
 async def root():
     return {"message": "Health App Backend running 🚀"}
 
+@app.get("/ready")
+async def ready():
+    if not db_init.indexes_ready:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "admission": admission_metrics(),
+        "cache": cache_metrics(),
+        "ai_usage": ai_usage_metrics(),
+        "events": events_metrics(),
+        "pregeneration": pregeneration.pregeneration_metrics(),
+        "archive": archive.archive_metrics(),
+    }
+
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(meals.router, prefix="/meals", tags=["Meals"])
@@ -39,6 +90,11 @@ app.include_router(daily.router, prefix="/daily-log", tags=["Daily Logs"])
 app.include_router(grocery.router, prefix="/grocery", tags=["Grocery"])
 app.include_router(goal.router, prefix="/goals", tags=["Goals"])
 app.include_router(activity.router, prefix="/activity", tags=["Activity"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(export.router, prefix="/export", tags=["Export"])
+app.include_router(bulk_import.router, prefix="/import", tags=["Import"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
+app.include_router(sync.router, prefix="/sync", tags=["Sync"])
 
 # THIS LINE IS THE FIX: It explicitly tells the app to use your meal_plans.py routes.
 app.include_router(meal_plans.router, prefix="/meal-plans", tags=["Meal Plans"])
@@ -8,8 +8,11 @@ class GroceryItem(BaseModel):
     user_id: str
     name: str
     name_lower: str
+    food_id: Optional[str] = None
     status: str = "in_stock"
     createdAt: datetime
+    # Set on POST when the pantry has a similarly spelled, different ingredient.
+    similar_to: Optional[str] = None
 
     class Config:
         populate_by_name = True
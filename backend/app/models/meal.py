@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Dict, Optional
 
 class MealGenerated(BaseModel):
     meal_type: str  # breakfast, lunch, snack, dinner
@@ -21,3 +22,21 @@ class MealCreate(BaseModel):
     date: datetime
 
 
+
+class RecentMeal(BaseModel):
+    """A distinct meal the user logged recently, with the nutrition stored for it."""
+    meal_id: str  # most recent occurrence; pass it to POST /daily-log/relog
+    meal_type: Optional[str] = None
+    description: str
+    nutrition: Dict[str, float] = Field(default_factory=dict)
+    last_logged: datetime
+    times_logged: int = 1
+
+class FavoriteCreate(BaseModel):
+    meal_id: str
+
+class FavoriteMeal(BaseModel):
+    favorite_id: str
+    meal_type: Optional[str] = None
+    description: str
+    nutrition: Dict[str, float] = Field(default_factory=dict)
@@ -1,9 +1,10 @@
 # backend/app/models/meal_plan.py
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class PlannedMeal(BaseModel):
+    meal_id: Optional[str] = None  # stable id for targeted edits; legacy meals may lack one
     date: str  # YYYY-MM-DD
     mealType: str # "breakfast", "lunch", "dinner", or "snack"
     name: str
@@ -14,9 +15,23 @@ class MealPlan(BaseModel):
     user_id: str
     weekStart: str # YYYY-MM-DD of the Monday of that week
     meals: List[PlannedMeal] = []
+    version: int = 0  # incremented on every write; PATCH requests must send the current value
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
         populate_by_name = True
         from_attributes = True
 
+class MealOperation(BaseModel):
+    """
+    One edit to a plan's meals. `add` appends `meal`; `replace` and `remove`
+    target a meal by `meal_id`, or by `index` for legacy meals without an id.
+    """
+    op: Literal["add", "replace", "remove"]
+    meal_id: Optional[str] = None
+    index: Optional[int] = Field(default=None, ge=0)
+    meal: Optional[PlannedMeal] = None
+
+class MealPlanPatch(BaseModel):
+    version: int
+    operations: List[MealOperation] = Field(..., min_length=1, max_length=50)
@@ -0,0 +1,181 @@
+# app/profiling.py
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it sends `X-Profile: <PROFILING_TOKEN>`, or when it
+is picked by PROFILING_SAMPLE_RATE. Its response then carries a Server-Timing
+header with the time spent in each phase:
+
+- auth: token decoding and the user lookup (get_user_from_token)
+- db: MongoDB commands, as timed by the driver (a command listener on the client)
+- ai: model calls (ai_service, mistral_service)
+- serialize: rendering the JSON response body
+- total: the whole request, up to the response headers
+
+Phases nest and may overlap (the user lookup counts as auth and db; concurrent
+queries each count in full), so they need not add up to `total`.
+
+A request that also sends `X-Profile-Flamegraph: 1` with the admin token gets a
+sampling-profiler (pyinstrument) HTML flame graph written to PROFILING_FLAMEGRAPH_DIR.
+
+Disabled, the cost is one ContextVar lookup per timer and per MongoDB command.
+"""
+import asyncio
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi.responses import JSONResponse
+from pymongo import monitoring
+from .config import settings
+
+LOG = logging.getLogger("profiling")
+
+PHASES = ("auth", "db", "ai", "serialize")
+
+
+class RequestProfile:
+    __slots__ = ("started", "durations", "counts", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # Driver callbacks and threadpool work record from other threads.
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+            self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def server_timing(self) -> str:
+        entries = []
+        for phase in PHASES:
+            if phase in self.durations:
+                count = self.counts[phase]
+                entries.append(f'{phase};dur={self.durations[phase] * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"')
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as `name` when the current request is profiled."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    Adds every MongoDB command's driver-measured duration to the profiled request
+    that issued it. Motor runs commands in its executor with a copy of the
+    caller's context, so the ContextVar resolves to the right request.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        profile = _current.get()
+        if profile is not None:
+            profile.add("db", event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """Default response class; times body rendering as the `serialize` phase."""
+
+    def render(self, content) -> bytes:
+        with phase("serialize"):
+            return super().render(content)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware, so unprofiled requests pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _admin_requested(self, scope) -> bool:
+        token = _header(scope, b"x-profile")
+        return bool(token and settings.PROFILING_TOKEN
+                    and secrets.compare_digest(token, settings.PROFILING_TOKEN.encode()))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (not settings.PROFILING_TOKEN and not settings.PROFILING_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+        admin = self._admin_requested(scope)
+        if not admin and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = self._start_flamegraph() if admin and _header(scope, b"x-profile-flamegraph") == b"1" else None
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if profiler is not None:
+                profiler.stop()
+                await asyncio.to_thread(self._write_flamegraph, profiler, scope)
+
+    def _start_flamegraph(self):
+        if not settings.PROFILING_FLAMEGRAPH_DIR:
+            return None
+        # Optional dependency: only needed when flame graphs are requested.
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            LOG.warning("X-Profile-Flamegraph needs the 'pyinstrument' package")
+            return None
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        return profiler
+
+    def _write_flamegraph(self, profiler, scope):
+        directory = Path(settings.PROFILING_FLAMEGRAPH_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = _UNSAFE_PATH_CHARS.sub("_", scope.get("path", "")).strip("_") or "root"
+        path = directory / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope.get('method', '')}-{slug}.html"
+        path.write_text(profiler.output_html())
+        LOG.info("Flame graph written to %s", path)
@@ -1,6 +1,7 @@
 # backend/app/routes/activity.py
-from fastapi import APIRouter, Depends
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, date, time, timedelta
+from typing import Optional
 from app.db import db
 from app.utils import to_object_id, to_str_id
 from ..services.auth_service import get_current_user
@@ -8,6 +9,16 @@ from ..models.activity import ActivityCreate
 
 router = APIRouter()
 
+DEFAULT_RANGE_DAYS = 30
+
+def _date_range(start: Optional[date], end: Optional[date]):
+    """Turn an inclusive [start, end] date range into datetime bounds; defaults to the last 30 days."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return datetime.combine(start, time.min), datetime.combine(end, time.max)
+
 @router.post("/")
 async def add_activity(payload: ActivityCreate, current_user=Depends(get_current_user)):
     doc = {
@@ -23,4 +34,52 @@ async def add_activity(payload: ActivityCreate, current_user=Depends(get_current
         "type": payload.type,
         "steps": payload.steps,
         "duration": payload.duration
-    }
\ No newline at end of file
+    }
+
+@router.get("/")
+async def get_activity(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user=Depends(get_current_user),
+):
+    range_start, range_end = _date_range(start, end)
+    cursor = db.activity.find(
+        {"user_id": to_object_id(current_user["_id"]), "createdAt": {"$gte": range_start, "$lte": range_end}}
+    ).sort("createdAt", 1)
+    activities = []
+    async for doc in cursor:
+        activities.append({
+            "_id": to_str_id(doc["_id"]),
+            "type": doc.get("type"),
+            "steps": doc.get("steps"),
+            "duration": doc.get("duration"),
+            "createdAt": doc.get("createdAt"),
+        })
+    return activities
+
+@router.get("/daily")
+async def get_daily_activity(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user=Depends(get_current_user),
+):
+    """
+    Per-day totals of steps and duration, aggregated server-side.
+    Days without any activity are omitted.
+    """
+    range_start, range_end = _date_range(start, end)
+    pipeline = [
+        {"$match": {
+            "user_id": to_object_id(current_user["_id"]),
+            "createdAt": {"$gte": range_start, "$lte": range_end},
+        }},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$createdAt"}},
+            "steps": {"$sum": {"$ifNull": ["$steps", 0]}},
+            "duration": {"$sum": {"$ifNull": ["$duration", 0]}},
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "date": "$_id", "steps": 1, "duration": 1, "count": 1}},
+    ]
+    return [doc async for doc in db.activity.aggregate(pipeline)]
@@ -0,0 +1,259 @@
+# backend/app/routes/bulk_import.py
+import csv
+import json
+from datetime import datetime, time, timezone
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..db import db
+from ..utils import to_object_id, to_str_id
+from ..services.auth_service import get_current_user
+from ..services.trend_service import invalidate_trend, parse_measured_at
+from ..models.activity import ActivityCreate
+from ..models.meal import MealCreate
+from ..models.nutrition import NutritionTotals
+from ..models.weight import WeightCreate
+from ..sync import SYNC_COLLECTIONS, reserve_seq
+from ..versioning import bump_version
+
+router = APIRouter()
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+MACRO_KEYS = list(NutritionTotals.model_fields)
+
+
+class RowError(ValueError):
+    pass
+
+
+async def _lines(request: Request):
+    """Split the request body into lines as it arrives, without buffering the whole upload."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def _rows(request: Request, fmt: str):
+    """Yield (line number, row dict) pairs. CSV input must use the /export column header."""
+    header = None
+    line_no = 0
+    async for line in _lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, RowError(f"Invalid JSON: {e.msg}")
+                continue
+            yield line_no, row if isinstance(row, dict) else RowError("Each line must be a JSON object")
+            continue
+        # Quoted fields spanning several lines are not supported.
+        values = next(csv.reader([line]))
+        if header is None:
+            header = values
+            continue
+        yield line_no, {k: v for k, v in zip(header, values) if v != ""}
+
+
+def _parse_datetime(value, fallback=None) -> datetime:
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        if fallback is not None:
+            return fallback
+        raise RowError(f"Invalid datetime: {value!r}")
+    # Stored datetimes are naive UTC; convert offsets instead of dropping them.
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _macros(row: dict) -> dict | None:
+    """Macros come nested (NDJSON export) or as flat columns (CSV export)."""
+    nested = row.get("nutrition")
+    flat = {k: row[k] for k in MACRO_KEYS if k in row}
+    if not nested and not flat:
+        return None
+    if nested and not isinstance(nested, dict):
+        raise RowError("nutrition must be an object")
+    return NutritionTotals(**(nested or flat)).model_dump()
+
+
+def _weight_doc(user_id, row: dict, now: datetime) -> dict:
+    payload = WeightCreate(weight=row.get("weight"), measuredAt=row.get("measuredAt") or row.get("createdAt") or "")
+    created = parse_measured_at(payload.measuredAt, _parse_datetime(row.get("createdAt"), now))
+    return {"user_id": user_id, "weight": payload.weight, "measuredAt": payload.measuredAt, "createdAt": created}
+
+
+def _meal_doc(user_id, row: dict, now: datetime) -> dict:
+    created = _parse_datetime(row.get("createdAt") or row.get("date"), now)
+    payload = MealCreate(meal_type=row.get("meal_type"), description=row.get("description"), date=row.get("date") or created)
+    doc = {
+        "user_id": user_id,
+        "meal_type": payload.meal_type,
+        "description": payload.description,
+        "date": payload.date,
+        "createdAt": created,
+    }
+    nutrition = _macros(row)
+    if nutrition:
+        doc["nutrition"] = nutrition
+    return doc
+
+
+def _activity_doc(user_id, row: dict, now: datetime) -> dict:
+    payload = ActivityCreate(type=row.get("type"), steps=row.get("steps"), duration=row.get("duration"))
+    return {
+        "user_id": user_id,
+        "type": payload.type,
+        "steps": payload.steps,
+        "duration": payload.duration,
+        "createdAt": _parse_datetime(row.get("createdAt"), now),
+    }
+
+
+ROW_BUILDERS = {
+    "weights": _weight_doc,
+    "meals": _meal_doc,
+    "activity": _activity_doc,
+}
+
+
+class _Importer:
+    """
+    Buffers validated documents (with their source line numbers) per collection
+    and writes them in unordered batches.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.pending = {name: [] for name in ROW_BUILDERS}
+        self.daily_increments = {}
+        self.inserted = {name: 0 for name in ROW_BUILDERS}
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, line_no: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    async def add(self, collection: str, doc: dict, line_no: int):
+        self.pending[collection].append((line_no, doc))
+        if len(self.pending[collection]) >= BATCH_SIZE:
+            await self.flush(collection)
+
+    def add_daily_increment(self, doc: dict):
+        day = datetime.combine(doc["createdAt"].date(), time.min)
+        totals = self.daily_increments.setdefault(day, dict.fromkeys(MACRO_KEYS, 0.0))
+        for key in MACRO_KEYS:
+            totals[key] += doc["nutrition"].get(key, 0)
+
+    async def flush(self, collection: str):
+        pending = self.pending[collection]
+        if pending:
+            docs = [doc for _, doc in pending]
+            first_seq = await reserve_seq(self.user_id, len(docs)) if collection in SYNC_COLLECTIONS else None
+            if first_seq is not None:
+                for i, doc in enumerate(docs):
+                    doc["seq"] = first_seq + i
+            failed = set()
+            try:
+                res = await db[collection].insert_many(docs, ordered=False)
+                self.inserted[collection] += len(res.inserted_ids)
+            except BulkWriteError as e:
+                # Unordered: everything except the failed documents was written.
+                self.inserted[collection] += e.details.get("nInserted", 0)
+                for err in e.details.get("writeErrors", []):
+                    failed.add(err["index"])
+                    self.error(pending[err["index"]][0], f"{collection}: {err.get('errmsg')}")
+            finally:
+                if first_seq is not None:
+                    await bump_version(self.user_id, release_seq=first_seq)
+            if collection == "meals":
+                # Only meals that were actually written count towards the day's totals.
+                for i, doc in enumerate(docs):
+                    if i not in failed and "nutrition" in doc:
+                        self.add_daily_increment(doc)
+            self.pending[collection] = []
+        if collection == "meals":
+            await self.flush_daily_totals()
+
+    async def flush_daily_totals(self):
+        if not self.daily_increments:
+            return
+        first_seq = await reserve_seq(self.user_id, len(self.daily_increments))
+        ops = [
+            UpdateOne(
+                {"user_id": self.user_id, "date": day},
+                {"$inc": {f"totals.{k}": v for k, v in totals.items()}, "$set": {"seq": first_seq + i}},
+                upsert=True,
+            )
+            for i, (day, totals) in enumerate(self.daily_increments.items())
+        ]
+        try:
+            await db.daily_logs.bulk_write(ops, ordered=False)
+        finally:
+            await bump_version(self.user_id, "daily_logs", release_seq=first_seq)
+        self.daily_increments = {}
+
+
+@router.post("/")
+async def import_history(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user=Depends(get_current_user),
+):
+    """
+    Imports weights, meals and activity from a raw NDJSON or CSV request body,
+    in the same row format that GET /export produces. Each row needs a
+    `collection` field. Daily log totals are rebuilt from the imported meals'
+    nutrition, so `daily_logs` rows are skipped.
+    """
+    user_id = to_object_id(current_user["_id"])
+    importer = _Importer(user_id)
+    now = datetime.utcnow()
+    skipped = 0
+
+    async for line_no, row in _rows(request, format):
+        if isinstance(row, RowError):
+            importer.error(line_no, str(row))
+            continue
+        collection = row.get("collection")
+        if collection == "daily_logs":
+            skipped += 1
+            continue
+        builder = ROW_BUILDERS.get(collection)
+        if builder is None:
+            importer.error(line_no, f"Unknown collection: {collection!r}")
+            continue
+        try:
+            doc = builder(user_id, row, now)
+        except ValidationError as e:
+            importer.error(line_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        except RowError as e:
+            importer.error(line_no, str(e))
+            continue
+        await importer.add(collection, doc, line_no)
+
+    for collection in ROW_BUILDERS:
+        await importer.flush(collection)
+    if importer.inserted["weights"]:
+        await invalidate_trend(to_str_id(user_id))
+
+    return {
+        "inserted": importer.inserted,
+        "skipped": skipped,
+        "error_count": importer.error_count,
+        "errors": importer.errors,
+    }
@@ -1,36 +1,66 @@
 # backend/app/routes/daily.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime, date
-from pydantic import BaseModel
-from typing import Dict, List
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from ..db import db
 from ..utils import to_object_id, to_str_id
-from ..models.nutrition import DailyLogPublic
+from ..models.nutrition import DailyLogPublic, NutritionTotals
 from ..services.auth_service import get_current_user
 from ..services.ai_service import estimate_calories
+from ..services.admission import admission
+from ..sync import reserve_seq
+from ..versioning import bump_version, not_modified, version_etag
+from ..events import publish
+from ..services.archive import iter_tiers
 
 router = APIRouter()
 
 class MealsPayload(BaseModel):
     meals: Dict[str, str]
 
+class RelogPayload(BaseModel):
+    """Past meals (GET /meals/recent) and favorites (GET /meals/favorites) to log again today."""
+    meal_ids: List[str] = Field(default_factory=list, max_length=20)
+    favorite_ids: List[str] = Field(default_factory=list, max_length=20)
+    meal_type: Optional[str] = None  # overrides the stored meal type, e.g. yesterday's dinner as lunch
+
+MACRO_KEYS = tuple(NutritionTotals.model_fields)
+
 @router.post("/calculate-macros", response_model=DailyLogPublic)
-async def calculate_and_save_macros(payload: MealsPayload, current_user=Depends(get_current_user)):
+async def calculate_and_save_macros(
+    payload: MealsPayload,
+    current_user=Depends(get_current_user),
+    _admitted=Depends(admission("calculate_macros")),
+):
     today_date = datetime.utcnow().date()
     today = datetime.combine(today_date, datetime.min.time())
     now = datetime.utcnow()
     user_id = to_object_id(current_user["_id"])
 
     total_macros = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "fiber": 0.0}
+    meal_docs = []
     
     for meal_type, description in payload.meals.items():
         if description:
-            nutrition = estimate_calories(description)
+            # The Gemini SDK call blocks; keep it off the event loop.
+            nutrition = await run_in_threadpool(estimate_calories, description)
             for key in total_macros:
                 total_macros[key] += nutrition.get(key, 0)
             
-            meal_doc = { "user_id": user_id, "createdAt": now, "meal_type": meal_type, "description": description, "nutrition": nutrition }
-            await db.meals.insert_one(meal_doc)
+            meal_docs.append({ "user_id": user_id, "createdAt": now, "meal_type": meal_type, "description": description, "nutrition": nutrition })
+
+    # Seqs are reserved after the AI calls, so a slow estimate does not hold back other devices' syncs.
+    first_seq = await reserve_seq(user_id, len(meal_docs) + 1)
+    log_seq = first_seq + len(meal_docs)
+    if meal_docs:
+        for i, meal_doc in enumerate(meal_docs):
+            meal_doc["seq"] = first_seq + i
+        await db.meals.insert_many(meal_docs)
+    logged_meals = [
+        {"_id": to_str_id(doc["_id"]), "meal_type": doc["meal_type"], "description": doc["description"]} for doc in meal_docs
+    ]
 
     existing_log = await db.daily_logs.find_one({"user_id": user_id, "date": today})
 
@@ -43,15 +73,17 @@ async def calculate_and_save_macros(payload: MealsPayload, current_user=Depends(
                 "totals.carbs": total_macros["carbs"],
                 "totals.fat": total_macros["fat"],
                 "totals.fiber": total_macros["fiber"],
-            }}
+            }, "$set": {"seq": log_seq}}
         )
     else:
         new_log_doc = {
             "user_id": user_id,
             "date": today,
-            "totals": total_macros
+            "totals": total_macros,
+            "seq": log_seq,
         }
         await db.daily_logs.insert_one(new_log_doc)
+    await bump_version(user_id, "daily_logs", release_seq=first_seq)
     
     updated_log = await db.daily_logs.find_one({"user_id": user_id, "date": today})
     if not updated_log:
@@ -59,19 +91,104 @@ async def calculate_and_save_macros(payload: MealsPayload, current_user=Depends(
 
     updated_log["_id"] = to_str_id(updated_log["_id"])
     updated_log["user_id"] = to_str_id(updated_log["user_id"])
+    await publish(user_id, "daily_totals", {
+        "date": today_date.isoformat(), "totals": updated_log["totals"], "meals": logged_meals,
+    })
+    return updated_log
+
+@router.post("/relog", response_model=DailyLogPublic)
+async def relog_meals(payload: RelogPayload, current_user=Depends(get_current_user)):
+    """
+    Adds past meals and favorites to today's log using the nutrition stored with
+    them: one insert_many for the meals and one upsert for the totals, and no AI call.
+    """
+    if not payload.meal_ids and not payload.favorite_ids:
+        raise HTTPException(status_code=422, detail="Select at least one meal or favorite.")
+    today_date = datetime.utcnow().date()
+    today = datetime.combine(today_date, datetime.min.time())
+    now = datetime.utcnow()
+    user_id = to_object_id(current_user["_id"])
+
+    sources = []
+    if payload.meal_ids:
+        meal_oids = [to_object_id(meal_id) for meal_id in payload.meal_ids]
+        found = {
+            doc["_id"]: doc
+            async for doc in iter_tiers(
+                "meals",
+                {"_id": {"$in": meal_oids}, "user_id": user_id},
+                projection={"meal_type": 1, "description": 1, "nutrition": 1},
+            )
+        }
+        missing = [meal_id for meal_id, oid in zip(payload.meal_ids, meal_oids) if oid not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Meals not found: {', '.join(missing)}")
+        # Keep the caller's order; the same meal may be selected twice.
+        sources.extend(found[oid] for oid in meal_oids)
+    if payload.favorite_ids:
+        favorites = {f["favorite_id"]: f for f in current_user.get("favorite_meals", [])}
+        missing = [fid for fid in payload.favorite_ids if fid not in favorites]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Favorites not found: {', '.join(missing)}")
+        sources.extend(favorites[fid] for fid in payload.favorite_ids)
+
+    total_macros = {key: 0.0 for key in MACRO_KEYS}
+    meal_docs = []
+    first_seq = await reserve_seq(user_id, len(sources) + 1)
+    for i, source in enumerate(sources):
+        nutrition = source.get("nutrition") or {}
+        for key in MACRO_KEYS:
+            total_macros[key] += nutrition.get(key, 0)
+        meal_docs.append({
+            "user_id": user_id,
+            "createdAt": now,
+            "meal_type": payload.meal_type or source.get("meal_type"),
+            "description": source.get("description"),
+            "nutrition": nutrition,
+            "seq": first_seq + i,
+        })
+    await db.meals.insert_many(meal_docs)
+
+    updated_log = await db.daily_logs.find_one_and_update(
+        {"user_id": user_id, "date": today},
+        {"$inc": {f"totals.{key}": value for key, value in total_macros.items()},
+         "$set": {"seq": first_seq + len(sources)}},
+        upsert=True,
+        return_document=True,
+    )
+    await bump_version(user_id, "daily_logs", release_seq=first_seq)
+
+    updated_log["_id"] = to_str_id(updated_log["_id"])
+    updated_log["user_id"] = to_str_id(updated_log["user_id"])
+    await publish(user_id, "daily_totals", {
+        "date": today_date.isoformat(),
+        "totals": updated_log["totals"],
+        "meals": [{"_id": to_str_id(doc["_id"]), "meal_type": doc["meal_type"], "description": doc["description"]} for doc in meal_docs],
+    })
     return updated_log
 
 @router.get("/", response_model=List[DailyLogPublic])
-async def get_daily_logs(current_user=Depends(get_current_user)):
+async def get_daily_logs(request: Request, response: Response, current_user=Depends(get_current_user)):
+    cached = not_modified(request, response, version_etag(current_user, "daily_logs"))
+    if cached:
+        return cached
+
     user_id = to_object_id(current_user["_id"])
-    cursor = db.daily_logs.find({"user_id": user_id})
-    logs = []
-    async for doc in cursor:
+    # Full history spans the hot collection and its archive.
+    logs = {}
+    async for doc in iter_tiers("daily_logs", {"user_id": user_id}):
         if "date" in doc and not isinstance(doc["date"], datetime):
              doc["date"] = datetime.combine(doc["date"], datetime.min.time())
-        
+
+        existing = logs.get(doc["date"])
+        if existing:
+            # A day re-imported after archiving has a hot log as well until the next archival run.
+            for key, value in (doc.get("totals") or {}).items():
+                existing["totals"][key] = existing["totals"].get(key, 0) + value
+            continue
+
         doc["_id"] = to_str_id(doc["_id"])
         doc["user_id"] = to_str_id(doc["user_id"])
-        
-        logs.append(doc)
-    return logs
\ No newline at end of file
+        doc.setdefault("totals", {})
+        logs[doc["date"]] = doc
+    return list(logs.values())
\ No newline at end of file
@@ -0,0 +1,80 @@
+# backend/app/routes/dashboard.py
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, time
+from typing import Optional
+from ..db import db
+from ..utils import to_object_id, to_str_id
+from ..services.auth_service import get_current_user
+
+router = APIRouter()
+
+DASHBOARD_FIELDS = ("totals", "meals", "pantry", "weight", "goal")
+
+
+async def _todays_totals(user_id, today_start):
+    log = await db.daily_logs.find_one({"user_id": user_id, "date": today_start}, {"totals": 1})
+    return log.get("totals") if log else None
+
+
+async def _todays_meals(user_id, today_start, today_end):
+    cursor = db.meals.find(
+        {"user_id": user_id, "createdAt": {"$gte": today_start, "$lte": today_end}},
+        {"meal_type": 1, "description": 1},
+    )
+    return [
+        {"_id": to_str_id(doc["_id"]), "meal_type": doc.get("meal_type"), "description": doc.get("description")}
+        async for doc in cursor
+    ]
+
+
+async def _pantry(user_id):
+    pantry = {"in_stock": [], "to_buy": []}
+    cursor = db.grocery.find(
+        {"user_id": user_id, "status": {"$in": list(pantry)}},
+        {"name": 1, "status": 1},
+    )
+    async for doc in cursor:
+        pantry[doc["status"]].append({"_id": to_str_id(doc["_id"]), "name": doc["name"], "status": doc["status"]})
+    return pantry
+
+
+async def _latest_weight(user_id):
+    doc = await db.weights.find_one(
+        {"user_id": user_id}, {"weight": 1, "measuredAt": 1}, sort=[("createdAt", -1)]
+    )
+    if not doc:
+        return None
+    return {"weight": doc.get("weight"), "measuredAt": doc.get("measuredAt")}
+
+
+async def _goal(user_id):
+    doc = await db.goals.find_one({"user_id": user_id}, {"_id": 0, "user_id": 0})
+    return doc
+
+
+@router.get("/today")
+async def get_todays_dashboard(fields: Optional[str] = None, current_user=Depends(get_current_user)):
+    """
+    Everything the planner page renders for today in one round trip.
+    Pass `fields` as a comma-separated subset of: totals, meals, pantry, weight, goal.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(DASHBOARD_FIELDS)
+    unknown = [f for f in requested if f not in DASHBOARD_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dashboard fields: {', '.join(unknown)}")
+
+    user_id = to_object_id(current_user["_id"])
+    today = datetime.utcnow().date()
+    today_start = datetime.combine(today, time.min)
+    today_end = datetime.combine(today, time.max)
+
+    queries = {
+        "totals": lambda: _todays_totals(user_id, today_start),
+        "meals": lambda: _todays_meals(user_id, today_start, today_end),
+        "pantry": lambda: _pantry(user_id),
+        "weight": lambda: _latest_weight(user_id),
+        "goal": lambda: _goal(user_id),
+    }
+    results = await asyncio.gather(*(queries[f]() for f in requested))
+    return {"date": today.isoformat(), **dict(zip(requested, results))}
@@ -0,0 +1,87 @@
+# backend/app/routes/events.py
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from ..config import settings
+from ..events import RESYNC, Subscription, get_event_backend
+from ..utils import to_str_id
+from ..services.auth_service import get_user_from_token
+
+router = APIRouter()
+
+RETRY_MS = 3000
+
+
+async def get_stream_user(
+    authorization: Optional[str] = Header(default=None),
+    access_token: Optional[str] = None,
+):
+    """
+    Browsers' EventSource cannot send an Authorization header, so the token may
+    also be passed as the `access_token` query parameter.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        return await get_user_from_token(authorization[7:])
+    if access_token:
+        return await get_user_from_token(access_token)
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+
+def _format(event: dict) -> str:
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _stream(request: Request, subscription: Subscription, last_event_id: Optional[int]):
+    backend = get_event_backend()
+    # Subscribe before replaying so nothing published in between is lost.
+    backend.add_subscriber(subscription)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        sent_id = last_event_id or 0
+        if last_event_id is not None:
+            for event in await backend.replay(subscription.user_id, last_event_id):
+                # After a resync the client's id is meaningless; accept every new event.
+                sent_id = 0 if event is RESYNC else max(sent_id, event.get("id", 0))
+                yield _format(event)
+        while not await request.is_disconnected():
+            event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if event is None:
+                # A comment line keeps proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+            elif "id" not in event or event["id"] > sent_id:
+                # Events published during the replay arrive twice; send them once.
+                sent_id = event.get("id", sent_id)
+                yield _format(event)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        backend.remove_subscriber(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(default=None),
+    current_user=Depends(get_stream_user),
+):
+    """
+    Server-sent events carrying small deltas for the user: `daily_totals`,
+    `pantry_item` and `weight`. On `resync` the client should refetch its full state.
+    """
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        after_id = None
+    subscription = Subscription(to_str_id(current_user["_id"]), settings.EVENTS_BUFFER_SIZE)
+    return StreamingResponse(
+        _stream(request, subscription, after_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,136 @@
+# backend/app/routes/export.py
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, date
+from typing import Optional
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..db import db
+from ..utils import to_object_id
+from ..services.auth_service import get_current_user
+from ..services.archive import TIERS, iter_tiers
+
+router = APIRouter()
+
+# Collection -> sort key. Export order within a collection is oldest first.
+EXPORT_COLLECTIONS = {
+    "weights": "createdAt",
+    "meals": "createdAt",
+    "daily_logs": "date",
+    "activity": "createdAt",
+}
+
+# Flat CSV columns shared by every collection; missing values are left blank.
+CSV_COLUMNS = [
+    "collection", "_id", "createdAt", "date", "weight", "measuredAt",
+    "meal_type", "description", "type", "steps", "duration",
+    "calories", "protein", "carbs", "fat", "fiber",
+]
+
+DEFAULT_BATCH_SIZE = 500
+FLUSH_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _ndjson_line(collection: str, doc: dict) -> str:
+    doc.pop("user_id", None)
+    return json.dumps({"collection": collection, **doc}, default=_json_default) + "\n"
+
+
+def _csv_row(collection: str, doc: dict) -> list:
+    # Meals keep macros under `nutrition`, daily logs under `totals`.
+    macros = doc.get("nutrition") or doc.get("totals") or {}
+    row = {"collection": collection, **doc, **macros}
+    out = []
+    for column in CSV_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, (ObjectId, datetime, date)):
+            value = _json_default(value)
+        out.append("" if value is None else value)
+    return out
+
+
+async def _export_lines(user_id: ObjectId, fmt: str, collections: list, batch_size: int):
+    """Yield text chunks straight from the Motor cursors, one batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(CSV_COLUMNS)
+
+    for collection in collections:
+        if collection in TIERS:
+            # Archived history is read first, so the export stays oldest first.
+            cursor = iter_tiers(collection, {"user_id": user_id}, batch_size=batch_size)
+        else:
+            cursor = (
+                db[collection]
+                .find({"user_id": user_id})
+                .sort(EXPORT_COLLECTIONS[collection], 1)
+                .batch_size(batch_size)
+            )
+        async for doc in cursor:
+            if writer:
+                writer.writerow(_csv_row(collection, doc))
+            else:
+                buffer.write(_ndjson_line(collection, doc))
+            if buffer.tell() >= FLUSH_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def _encode(chunks, compress: bool):
+    if not compress:
+        async for chunk in chunks:
+            yield chunk.encode("utf-8")
+        return
+    # wbits=31 produces a gzip container.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/")
+async def export_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    collections: Optional[str] = None,
+    gzip: bool = False,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    current_user=Depends(get_current_user),
+):
+    """
+    Streams the user's full history as NDJSON or CSV without loading it into memory.
+    `collections` is a comma-separated subset of: weights, meals, daily_logs, activity.
+    """
+    selected = [c.strip() for c in collections.split(",") if c.strip()] if collections else list(EXPORT_COLLECTIONS)
+    unknown = [c for c in selected if c not in EXPORT_COLLECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown export collections: {', '.join(unknown)}")
+
+    user_id = to_object_id(current_user["_id"])
+    filename = f"health-export.{format}" + (".gz" if gzip else "")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        _encode(_export_lines(user_id, format, selected, batch_size), gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,11 @@
 # backend/app/routes/goal.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from ..db import db
-from ..utils import to_object_id
+from ..utils import to_object_id, to_str_id
 from ..services.auth_service import get_current_user
 from ..models.goal import Goal, GoalCreate
+from ..services.trend_service import invalidate_trend
+from ..versioning import bump_version, not_modified, version_etag
 
 router = APIRouter()
 
@@ -19,6 +21,9 @@ async def set_user_goal(goal_payload: GoalCreate, current_user=Depends(get_curre
         {"$set": goal_doc},
         upsert=True
     )
+    # The weight trend's goal projection depends on target_weight.
+    await invalidate_trend(to_str_id(user_id))
+    await bump_version(user_id, "goals")
     
     updated_goal = await db.goals.find_one({"user_id": user_id})
     if not updated_goal:
@@ -27,7 +32,11 @@ async def set_user_goal(goal_payload: GoalCreate, current_user=Depends(get_curre
     return updated_goal
 
 @router.get("/", response_model=Goal)
-async def get_user_goal(current_user=Depends(get_current_user)):
+async def get_user_goal(request: Request, response: Response, current_user=Depends(get_current_user)):
+    cached = not_modified(request, response, version_etag(current_user, "goals"))
+    if cached:
+        return cached
+
     user_id = to_object_id(current_user["_id"])
     goal = await db.goals.find_one({"user_id": user_id})
     
@@ -1,42 +1,98 @@
 # backend/app/routes/grocery.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from datetime import datetime
 from ..db import db
 from ..utils import to_object_id, to_str_id  # Ensure to_str_id is imported
 from ..services.auth_service import get_current_user
 from ..models.grocery import GroceryItem, GroceryCreate
+from ..services.ingredients import IngredientIndex, food_id
+from ..sync import record_deletes, reserve_seq
+from ..versioning import bump_version, not_modified, version_etag
+from ..events import publish
 
 router = APIRouter()
 
+def pantry_event(doc: dict) -> dict:
+    """Delta payload for a created or updated pantry item."""
+    return {"action": "upsert", "item": {
+        "_id": to_str_id(doc["_id"]), "name": doc["name"], "status": doc["status"], "food_id": doc.get("food_id"),
+    }}
+
+def serialize_item(doc: dict) -> dict:
+    """Grocery document with string ids, as GroceryItem expects."""
+    doc["_id"] = to_str_id(doc["_id"])
+    doc["user_id"] = to_str_id(doc["user_id"])
+    return doc
+
+async def load_pantry(user_id):
+    """
+    All of a user's grocery documents keyed by food id (most recently added first),
+    plus a matching index over them.
+    Legacy documents without a stored food_id are normalized on the fly.
+    """
+    cursor = db.grocery.find({"user_id": user_id}, {"name": 1, "food_id": 1, "status": 1}).sort("createdAt", -1)
+    by_food_id = {}
+    async for doc in cursor:
+        by_food_id.setdefault(doc.get("food_id") or food_id(doc["name"]), doc)
+    return by_food_id, IngredientIndex(by_food_id)
+
 @router.post("/", response_model=GroceryItem)
 async def add_grocery_item(item: GroceryCreate, current_user=Depends(get_current_user)):
     user_id = to_object_id(current_user["_id"])
     name_lower = item.name.lower()
 
-    existing = await db.grocery.find_one({
-        "user_id": user_id,
-        "name_lower": name_lower,
-        "status": item.status
-    })
+    # "Tomatoes", "tomato" and "roma tomatoes" are the same pantry entry.
+    pantry, index = await load_pantry(user_id)
+    match = index.exact(item.name)
+    existing = pantry.get(match) if match else None
+    if existing and existing["status"] == item.status:
+        raise HTTPException(status_code=409, detail=f"Item '{existing['name']}' already in your '{item.status}' list.")
+    seq = await reserve_seq(user_id)
     if existing:
-        raise HTTPException(status_code=409, detail=f"Item '{item.name}' already in your '{item.status}' list.")
+        # Same ingredient on the other list: move it rather than adding a duplicate.
+        updated = await db.grocery.find_one_and_update(
+            {"_id": existing["_id"]},
+            {"$set": {"status": item.status, "food_id": match, "seq": seq}},
+            return_document=True
+        )
+        await bump_version(user_id, "grocery", release_seq=seq)
+        await publish(user_id, "pantry_item", pantry_event(updated))
+        return serialize_item(updated)
 
+    # A fuzzy hit ("tomatoe") may be a typo, or a different ingredient; add the
+    # item either way and only point the existing one out.
+    similar = index.match(item.name)
     doc = {
         "user_id": user_id,
         "name": item.name,
         "name_lower": name_lower,
+        "food_id": food_id(item.name),
         "status": item.status,
         "createdAt": datetime.utcnow(),
+        "seq": seq,
     }
     res = await db.grocery.insert_one(doc)
+    await bump_version(user_id, "grocery", release_seq=seq)
     
     created_doc = await db.grocery.find_one({"_id": res.inserted_id})
-    return created_doc
+    await publish(user_id, "pantry_item", pantry_event(created_doc))
+    if similar:
+        created_doc["similar_to"] = pantry[similar]["name"]
+    return serialize_item(created_doc)
 
 
 @router.get("/", response_model=List[GroceryItem])
-async def get_grocery_items(status: str = "in_stock", current_user=Depends(get_current_user)):
+async def get_grocery_items(
+    request: Request,
+    response: Response,
+    status: str = "in_stock",
+    current_user=Depends(get_current_user),
+):
+    cached = not_modified(request, response, version_etag(current_user, "grocery", status))
+    if cached:
+        return cached
+
     user_id = to_object_id(current_user["_id"])
     cursor = db.grocery.find({"user_id": user_id, "status": status})
     
@@ -44,9 +100,7 @@ async def get_grocery_items(status: str = "in_stock", current_user=Depends(get_c
     # We must manually convert ObjectId to string before returning the response.
     items = []
     async for doc in cursor:
-        doc["_id"] = to_str_id(doc["_id"])
-        doc["user_id"] = to_str_id(doc["user_id"])
-        items.append(doc)
+        items.append(serialize_item(doc))
     
     return items
 
@@ -57,21 +111,31 @@ async def update_item_status(item_id: str, new_status: str, current_user=Depends
         raise HTTPException(status_code=400, detail="Status must be 'in_stock' or 'to_buy'")
 
     user_id = to_object_id(current_user["_id"])
+    seq = await reserve_seq(user_id)
     
     res = await db.grocery.find_one_and_update(
         {"_id": to_object_id(item_id), "user_id": user_id},
-        {"$set": {"status": new_status}},
+        {"$set": {"status": new_status, "seq": seq}},
         return_document=True
     )
     if not res:
+        await bump_version(user_id, release_seq=seq)
         raise HTTPException(status_code=404, detail="Grocery item not found")
-    return res
+    await bump_version(user_id, "grocery", release_seq=seq)
+    await publish(user_id, "pantry_item", pantry_event(res))
+    return serialize_item(res)
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_grocery_item(item_id: str, current_user=Depends(get_current_user)):
     user_id = to_object_id(current_user["_id"])
-    res = await db.grocery.delete_one({"_id": to_object_id(item_id), "user_id": user_id})
+    oid = to_object_id(item_id)
+    seq = await reserve_seq(user_id)
+    res = await db.grocery.delete_one({"_id": oid, "user_id": user_id})
     if res.deleted_count == 0:
+        await bump_version(user_id, release_seq=seq)
         raise HTTPException(status_code=404, detail="Grocery item not found")
+    await record_deletes(user_id, "grocery", [oid], seq)
+    await bump_version(user_id, "grocery", release_seq=seq)
+    await publish(user_id, "pantry_item", {"action": "delete", "_id": item_id})
     return None
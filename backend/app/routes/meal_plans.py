@@ -1,75 +1,89 @@
 # backend/app/routes/meal_plans.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from datetime import datetime
 from ..db import db
-from ..utils import to_object_id
+from ..utils import to_object_id, to_str_id
 from ..services.auth_service import get_current_user
-from ..services.ai_service import generate_meal_plan
-from ..models.meal_plan import MealPlan, PlannedMeal
+from ..services.admission import admission
+from ..services.meal_plan_service import generate_plan_meals, new_meal_id, next_version, plan_expires_at
+from ..models.meal_plan import MealOperation, MealPlan, MealPlanPatch
+from ..versioning import bump_version, not_modified, version_etag
 
-# --- DEBUG LOG ---
-# This will print in your terminal when the server starts if the file is loaded.
-print("[DEBUG] SUCCESS: Loading meal_plans.py routes...")
+LOG = logging.getLogger("meal_plans")
 
 router = APIRouter()
 
+def serialize_plan(plan: dict) -> dict:
+    """Plan document with string ids, as MealPlan expects."""
+    plan["_id"] = to_str_id(plan["_id"])
+    plan["user_id"] = to_str_id(plan["user_id"])
+    return plan
+
 @router.get("/{week_start_date}", response_model=MealPlan)
-async def get_meal_plan(week_start_date: str, current_user=Depends(get_current_user)):
+async def get_meal_plan(
+    week_start_date: str,
+    request: Request,
+    response: Response,
+    current_user=Depends(get_current_user),
+):
     """
     Fetches the meal plan for a specific week.
     """
-    # --- DEBUG LOG ---
-    print(f"\n[DEBUG] HIT: GET /meal-plans/{{week_start_date}} endpoint.")
-    print(f"[DEBUG] week_start_date received from URL: '{week_start_date}'")
-
     user_id = to_object_id(current_user["_id"])
-    print(f"[DEBUG] Querying database for user_id: '{user_id}' and weekStart: '{week_start_date}'")
+    LOG.debug("Fetching meal plan for user_id=%s weekStart=%s", user_id, week_start_date)
 
     plan = await db.meal_plans.find_one({"user_id": user_id, "weekStart": week_start_date})
     
-    if not plan:
-        print(f"[DEBUG] RESULT: Meal plan NOT FOUND in database.")
+    # The TTL monitor deletes expired plans without a version bump, and only
+    # every minute or so; treat a plan past `expiresAt` as gone already.
+    expires_at = plan.get("expiresAt") if plan else None
+    if not plan or (expires_at and expires_at <= datetime.utcnow()):
+        LOG.debug("Meal plan not found for user_id=%s weekStart=%s", user_id, week_start_date)
         raise HTTPException(status_code=404, detail="Meal plan not found for this week.")
-    
-    print(f"[DEBUG] RESULT: Meal plan FOUND. Returning plan with ID: {plan.get('_id')}")
-    return plan
+
+    # `expiresAt` in the ETag: a replacement plan written after the old one
+    # expired never matches a tag cached for the old one.
+    etag = version_etag(current_user, "meal_plans", week_start_date, expires_at.isoformat() if expires_at else "")
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+    return serialize_plan(plan)
 
 # (The rest of your generate and update functions remain the same)
 @router.post("/generate", response_model=MealPlan, status_code=status.HTTP_201_CREATED)
-async def generate_new_meal_plan(payload: dict, current_user=Depends(get_current_user)):
+async def generate_new_meal_plan(
+    payload: dict,
+    current_user=Depends(get_current_user),
+    _admitted=Depends(admission("generate_meal_plan")),
+):
     user_id = to_object_id(current_user["_id"])
     week_start = payload.get("weekStart")
     if not week_start:
         raise HTTPException(status_code=400, detail="weekStart is required.")
 
-    latest_weight_doc = await db.weights.find_one({"user_id": user_id}, sort=[("createdAt", -1)])
-    goal_doc = await db.goals.find_one({"user_id": user_id})
-    current_weight = latest_weight_doc.get("weight") if latest_weight_doc else 75
-    goal = goal_doc.get("goal_type") if goal_doc else "maintenance"
-
-    grocery_cursor = db.grocery.find({"user_id": user_id, "status": "in_stock"})
-    in_stock_items = [doc["name"] async for doc in grocery_cursor]
-
-    ai_plan = generate_meal_plan(goal, current_weight, in_stock_items)
+    meals = await generate_plan_meals(user_id, week_start)
+    now = datetime.utcnow()
 
-    new_plan_doc = {
-        "user_id": user_id,
-        "weekStart": week_start,
-        "meals": [
-            PlannedMeal(date=week_start, mealType="breakfast", name=ai_plan.get("breakfast", "N/A")).dict(),
-            PlannedMeal(date=week_start, mealType="lunch", name=ai_plan.get("lunch", "N/A")).dict(),
-            PlannedMeal(date=week_start, mealType="dinner", name=ai_plan.get("dinner", "N/A")).dict(),
-        ],
-        "createdAt": datetime.utcnow(),
-    }
-
-    result = await db.meal_plans.find_one_and_replace(
+    # Replace the plan but keep its version increasing, so edits based on the
+    # previous plan are rejected instead of applied to the new one.
+    result = await db.meal_plans.find_one_and_update(
         {"user_id": user_id, "weekStart": week_start},
-        new_plan_doc,
+        [{"$set": {
+            "user_id": user_id,
+            "weekStart": {"$literal": week_start},
+            "meals": {"$literal": meals},
+            "createdAt": now,
+            "expiresAt": plan_expires_at(week_start, now),
+            "pregenerated": False,
+            "version": next_version(),
+        }}],
         upsert=True,
         return_document=True
     )
-    return result
+    await bump_version(user_id, "meal_plans")
+    return serialize_plan(result)
 
 @router.post("/", response_model=MealPlan)
 async def update_meal_plan(plan_update: dict, current_user=Depends(get_current_user)):
@@ -80,10 +94,147 @@ async def update_meal_plan(plan_update: dict, current_user=Depends(get_current_u
 
     updated_plan = await db.meal_plans.find_one_and_update(
         {"_id": plan_id, "user_id": user_id},
-        {"$set": update_data},
+        {"$set": update_data, "$inc": {"version": 1}},
         return_document=True
     )
     if not updated_plan:
         raise HTTPException(status_code=404, detail="Plan not found or you do not have permission to edit it.")
-    return updated_plan
+    await bump_version(user_id, "meal_plans")
+    return serialize_plan(updated_plan)
+
+
+def _validate_operation(op: MealOperation):
+    if op.op in ("add", "replace") and op.meal is None:
+        raise HTTPException(status_code=422, detail=f"'{op.op}' requires a meal.")
+    if op.op in ("replace", "remove") and (op.meal_id is None) == (op.index is None):
+        raise HTTPException(status_code=422, detail=f"'{op.op}' requires exactly one of meal_id or index.")
+
+def _added_id(op: MealOperation) -> Optional[str]:
+    """meal_id an `add` operation asks for, if any (otherwise a new one is generated)."""
+    return (op.meal_id or op.meal.meal_id) if op.op == "add" else None
+
+def _validate_patch(operations):
+    """
+    Indexes refer to the stored array, so only one indexed operation is allowed
+    and it must come first; later ones would see an array the earlier ones
+    already shifted or shortened. Added meal ids must be unique.
+    """
+    indexed = [i for i, op in enumerate(operations) if op.op != "add" and op.index is not None]
+    if indexed and indexed != [0]:
+        raise HTTPException(status_code=422, detail="Only one operation by index is allowed, and it must be the first.")
+    added = [_added_id(op) for op in operations if _added_id(op)]
+    if len(added) != len(set(added)):
+        raise HTTPException(status_code=422, detail="The same meal_id is added more than once.")
+
+def _meal_doc(op: MealOperation) -> dict:
+    meal = op.meal.dict()
+    meal["meal_id"] = op.meal_id or meal.get("meal_id") or new_meal_id()
+    return meal
+
+def _single_operation_update(op: MealOperation):
+    """
+    Filter and update for a single operation using positional / array-filter
+    operators, or None when the operation needs the pipeline form.
+    """
+    if op.op == "add":
+        meal = _meal_doc(op)
+        return {"meals.meal_id": {"$ne": meal["meal_id"]}}, {"$push": {"meals": meal}}, None
+    if op.op == "replace" and op.meal_id is not None:
+        return ({"meals.meal_id": op.meal_id},
+                {"$set": {"meals.$[m]": _meal_doc(op)}},
+                [{"m.meal_id": op.meal_id}])
+    if op.op == "replace":
+        return {f"meals.{op.index}": {"$exists": True}}, {"$set": {f"meals.{op.index}": _meal_doc(op)}}, None
+    if op.op == "remove" and op.meal_id is not None:
+        return {"meals.meal_id": op.meal_id}, {"$pull": {"meals": {"meal_id": op.meal_id}}}, None
+    return None
+
+def _pipeline_meals(operations) -> dict:
+    """
+    Fold every operation into one aggregation expression over `$meals`, so a
+    multi-operation patch is still a single atomic update.
+    """
+    expr = {"$ifNull": ["$meals", []]}
+    for op in operations:
+        if op.op == "add":
+            expr = {"$concatArrays": [expr, [{"$literal": _meal_doc(op)}]]}
+        elif op.meal_id is not None and op.op == "remove":
+            expr = {"$filter": {"input": expr, "cond": {"$ne": ["$$this.meal_id", op.meal_id]}}}
+        elif op.meal_id is not None:
+            expr = {"$map": {"input": expr, "in": {
+                "$cond": [{"$eq": ["$$this.meal_id", op.meal_id]}, {"$literal": _meal_doc(op)}, "$$this"]
+            }}}
+        else:
+            # $slice needs a positive count; the array size is always large enough.
+            middle = [] if op.op == "remove" else [{"$literal": _meal_doc(op)}]
+            expr = {"$let": {"vars": {"arr": expr}, "in": {"$concatArrays": [
+                {"$slice": ["$$arr", op.index]},
+                middle,
+                {"$slice": ["$$arr", op.index + 1, {"$max": [{"$size": "$$arr"}, 1]}]},
+            ]}}}
+    return expr
+
+@router.patch("/{plan_id}/meals", response_model=MealPlan)
+async def patch_meal_plan_meals(plan_id: str, patch: MealPlanPatch, current_user=Depends(get_current_user)):
+    """
+    Applies add/replace/remove operations to a plan's meals in one atomic update.
+    The update only applies if `version` matches the stored plan; otherwise 409.
+    At most one operation may target a meal by index, and it must come first;
+    adding a meal_id the plan already has is a 409.
+    """
+    user_id = to_object_id(current_user["_id"])
+    oid = to_object_id(plan_id)
+    for op in patch.operations:
+        _validate_operation(op)
+    _validate_patch(patch.operations)
+
+    query = {"_id": oid, "user_id": user_id, "version": patch.version}
+    if patch.version == 0:
+        # Plans written before versioning have no version field.
+        query["version"] = {"$in": [0, None]}
+
+    single = _single_operation_update(patch.operations[0]) if len(patch.operations) == 1 else None
+    if single:
+        extra_filter, update, array_filters = single
+        update["$inc"] = {"version": 1}
+        updated_plan = await db.meal_plans.find_one_and_update(
+            {**query, **extra_filter}, update, array_filters=array_filters, return_document=True
+        )
+    else:
+        first = patch.operations[0]
+        if first.op != "add" and first.index is not None:
+            # The one indexed operation runs first, on the stored array.
+            query[f"meals.{first.index}"] = {"$exists": True}
+        added = {_added_id(op) for op in patch.operations if _added_id(op)}
+        targeted = {op.meal_id for op in patch.operations if op.op != "add" and op.meal_id is not None} - added
+        meal_ids = {}
+        if targeted:
+            meal_ids["$all"] = sorted(targeted)
+        if added:
+            # An added meal must not duplicate one already in the plan.
+            meal_ids["$nin"] = sorted(added)
+        if meal_ids:
+            query["meals.meal_id"] = meal_ids
+        updated_plan = await db.meal_plans.find_one_and_update(
+            query,
+            [{"$set": {"meals": _pipeline_meals(patch.operations), "version": next_version()}}],
+            return_document=True
+        )
+
+    if not updated_plan:
+        current = await db.meal_plans.find_one({"_id": oid, "user_id": user_id}, {"version": 1, "meals.meal_id": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Plan not found or you do not have permission to edit it.")
+        if current.get("version", 0) != patch.version:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Meal plan was modified by another device.", "version": current.get("version", 0)},
+            )
+        existing = {meal.get("meal_id") for meal in current.get("meals", [])}
+        duplicates = sorted(meal_id for meal_id in map(_added_id, patch.operations) if meal_id and meal_id in existing)
+        if duplicates:
+            raise HTTPException(status_code=409, detail=f"Meal {duplicates[0]} is already in this plan.")
+        raise HTTPException(status_code=404, detail="Meal not found in this plan.")
 
+    await bump_version(user_id, "meal_plans")
+    return serialize_plan(updated_plan)
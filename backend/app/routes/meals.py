@@ -1,14 +1,32 @@
 # backend/app/routes/meals.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from datetime import datetime, time
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime, time, timedelta
+from typing import List
+from pymongo import UpdateOne
 from ..db import db
 from ..utils import to_object_id, to_str_id
 from ..services.ai_service import generate_meal_plan
 from ..services.auth_service import get_current_user
-from ..models.meal import MealCreate
+from ..services.admission import admission
+from ..versioning import bump_version
+from ..sync import reserve_seq
+from ..services.ingredients import dedupe, food_id
+from ..models.meal import FavoriteCreate, FavoriteMeal, MealCreate, RecentMeal
+from .grocery import load_pantry
+from ..events import publish
+from ..services.archive import TIERS, find_one_across_tiers, reaches_archive
 
 router = APIRouter()
 
+# Most recent meal documents considered by GET /recent before collapsing duplicates.
+RECENT_SCAN_LIMIT = 500
+MAX_FAVORITES = 50
+
+def meal_key(description: str) -> str:
+    return (description or "").strip().lower()
+
 @router.get("/today")
 async def get_todays_meals(current_user=Depends(get_current_user)):
     user_id = to_object_id(current_user["_id"])
@@ -28,7 +46,10 @@ async def get_todays_meals(current_user=Depends(get_current_user)):
     return meals
 
 @router.post("/suggest-day", response_model=dict)
-async def suggest_todays_meals(current_user=Depends(get_current_user)):
+async def suggest_todays_meals(
+    current_user=Depends(get_current_user),
+    _admitted=Depends(admission("suggest_day")),
+):
     """
     Generates a personalized meal suggestion and updates the user's shopping list.
     """
@@ -53,13 +74,14 @@ async def suggest_todays_meals(current_user=Depends(get_current_user)):
     current_weight = latest_weight_doc.get("weight") if latest_weight_doc else 75
     goal = goal_doc.get("goal_type") if goal_doc else "maintenance"
 
-    # Fetch pantry items for the AI
-    grocery_cursor = db.grocery.find({"user_id": user_id, "status": "in_stock"})
-    in_stock_items = [doc["name"] async for doc in grocery_cursor]
+    # Fetch pantry items for the AI; one entry per ingredient however it was spelled
+    pantry, pantry_index = await load_pantry(user_id)
+    in_stock_items = dedupe(doc["name"] for doc in pantry.values() if doc["status"] == "in_stock")
 
     try:
         # Call the enhanced AI service
-        ai_response = generate_meal_plan(
+        ai_response = await run_in_threadpool(
+            generate_meal_plan,
             goal=goal,
             current_weight=current_weight,
             grocery_list=in_stock_items,
@@ -67,21 +89,38 @@ async def suggest_todays_meals(current_user=Depends(get_current_user)):
         )
         
         # Check for a shopping list and add items to the user's grocery 'to_buy' list
-        shopping_list = ai_response.get("shopping_list")
-        if shopping_list:
-            for item_name in shopping_list:
-                # Use upsert to avoid duplicate items in the 'to_buy' list
-                await db.grocery.update_one(
-                    {"user_id": user_id, "name_lower": item_name.lower()},
-                    {"$set": {
+        # Skip anything already in the pantry (either list) as the same ingredient
+        shopping_list = ai_response.get("shopping_list") or []
+        new_items = []
+        for item_name in shopping_list:
+            if pantry_index.exact(item_name):
+                continue
+            fid = food_id(item_name)
+            pantry_index.add(fid)
+            new_items.append((item_name, fid))
+        if new_items:
+            first_seq = await reserve_seq(user_id, len(new_items))
+            added = [{"name": name, "food_id": fid, "status": "to_buy"} for name, fid in new_items]
+            ops = [
+                UpdateOne(
+                    {"user_id": user_id, "food_id": fid},
+                    {"$setOnInsert": {
                         "user_id": user_id,
-                        "name": item_name,
-                        "name_lower": item_name.lower(),
+                        "name": name,
+                        "name_lower": name.lower(),
+                        "food_id": fid,
                         "status": "to_buy",
-                        "createdAt": datetime.utcnow()
+                        "createdAt": datetime.utcnow(),
+                        "seq": first_seq + i,
                     }},
                     upsert=True
                 )
+                for i, (name, fid) in enumerate(new_items)
+            ]
+            result = await db.grocery.bulk_write(ops, ordered=False)
+            await bump_version(user_id, "grocery", release_seq=first_seq)
+            for position, upserted_id in result.upserted_ids.items():
+                await publish(user_id, "pantry_item", {"action": "upsert", "item": {"_id": to_str_id(upserted_id), **added[position]}})
         
         # Return only the meal plan part to the frontend
         meal_plan = {
@@ -96,14 +135,108 @@ async def suggest_todays_meals(current_user=Depends(get_current_user)):
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_meal_entry(meal: MealCreate, current_user=Depends(get_current_user)):
     user_id = to_object_id(current_user["_id"])
+    seq = await reserve_seq(user_id)
     
     meal_doc = {
         "user_id": user_id,
         "meal_type": meal.meal_type,
         "description": meal.description,
         "date": meal.date,
-        "createdAt": datetime.utcnow()
+        "createdAt": datetime.utcnow(),
+        "seq": seq,
     }
     await db.meals.insert_one(meal_doc)
+    await bump_version(user_id, release_seq=seq)
     return {"message": "Meal created successfully"}
 
+
+@router.get("/recent", response_model=List[RecentMeal])
+async def get_recent_meals(
+    days: int = Query(default=30, ge=1, le=365),
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user=Depends(get_current_user),
+):
+    """
+    Distinct meals logged in the last `days` days, most recent first, with the
+    nutrition estimated when they were logged. Re-log them through
+    POST /daily-log/relog without another AI call.
+    """
+    user_id = to_object_id(current_user["_id"])
+    since = datetime.utcnow() - timedelta(days=days)
+    # Served by the (user_id, createdAt) indexes; each tier's scan is capped before grouping.
+    scan = [
+        {"$match": {"user_id": user_id, "createdAt": {"$gte": since}, "nutrition": {"$exists": True}}},
+        {"$sort": {"createdAt": -1}},
+        {"$limit": RECENT_SCAN_LIMIT},
+    ]
+    pipeline = list(scan)
+    if await reaches_archive("meals", since):
+        pipeline += [
+            {"$unionWith": {"coll": TIERS["meals"][0], "pipeline": scan}},
+            {"$sort": {"createdAt": -1}},
+            {"$limit": RECENT_SCAN_LIMIT},
+        ]
+    pipeline += [
+        {"$group": {
+            "_id": {"$toLower": {"$trim": {"input": {"$ifNull": ["$description", ""]}}}},
+            "meal_id": {"$first": "$_id"},
+            "meal_type": {"$first": "$meal_type"},
+            "description": {"$first": "$description"},
+            "nutrition": {"$first": "$nutrition"},
+            "last_logged": {"$first": "$createdAt"},
+            "times_logged": {"$sum": 1},
+        }},
+        {"$match": {"_id": {"$ne": ""}}},
+        {"$sort": {"last_logged": -1}},
+        {"$limit": limit},
+    ]
+    meals = []
+    async for doc in db.meals.aggregate(pipeline):
+        doc.pop("_id")
+        doc["meal_id"] = to_str_id(doc["meal_id"])
+        meals.append(doc)
+    return meals
+
+@router.get("/favorites", response_model=List[FavoriteMeal])
+async def get_favorite_meals(current_user=Depends(get_current_user)):
+    # Favorites live on the user document, which get_current_user has already loaded.
+    return current_user.get("favorite_meals", [])
+
+@router.post("/favorites", response_model=FavoriteMeal, status_code=status.HTTP_201_CREATED)
+async def add_favorite_meal(payload: FavoriteCreate, current_user=Depends(get_current_user)):
+    """
+    Saves a logged meal, with its stored nutrition, as a favorite. Favoriting a
+    meal with the same description again returns the existing favorite.
+    """
+    user_id = to_object_id(current_user["_id"])
+    meal = await find_one_across_tiers("meals", {"_id": to_object_id(payload.meal_id), "user_id": user_id})
+    if not meal:
+        raise HTTPException(status_code=404, detail="Meal not found.")
+
+    key = meal_key(meal.get("description"))
+    favorite = {
+        "favorite_id": uuid.uuid4().hex[:12],
+        "key": key,
+        "meal_type": meal.get("meal_type"),
+        "description": meal.get("description") or "",
+        "nutrition": meal.get("nutrition") or {},
+    }
+    result = await db.users.update_one(
+        {"_id": user_id, "favorite_meals.key": {"$ne": key}},
+        {"$push": {"favorite_meals": {"$each": [favorite], "$slice": -MAX_FAVORITES}}},
+    )
+    if result.modified_count == 0:
+        user = await db.users.find_one({"_id": user_id}, {"favorite_meals": 1})
+        existing = next((f for f in user.get("favorite_meals", []) if f.get("key") == key), None)
+        if existing:
+            return existing
+    return favorite
+
+@router.delete("/favorites/{favorite_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_favorite_meal(favorite_id: str, current_user=Depends(get_current_user)):
+    user_id = to_object_id(current_user["_id"])
+    result = await db.users.update_one(
+        {"_id": user_id}, {"$pull": {"favorite_meals": {"favorite_id": favorite_id}}}
+    )
+    if result.modified_count == 0:
+        raise HTTPException(status_code=404, detail="Favorite not found.")
@@ -0,0 +1,96 @@
+# backend/app/routes/sync.py
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..config import settings
+from ..db import db
+from ..utils import to_object_id, to_str_id
+from ..services.auth_service import get_current_user
+from ..services.archive import TIERS, reaches_archive
+from ..sync import SYNC_COLLECTIONS, TOMBSTONES_COLLECTION, decode_token, encode_token, safe_seq
+
+router = APIRouter()
+
+
+async def _changed(collection: str, user_id, after: int, upper: int, limit: int):
+    """Documents of one collection (both tiers) with after < seq <= upper, lowest seq first."""
+    match = {"$match": {"user_id": user_id, "seq": {"$gt": after, "$lte": upper}}}
+    pipeline = [match, {"$sort": {"seq": 1}}, {"$limit": limit}]
+    if collection in TIERS and await reaches_archive(collection, None):
+        pipeline += [
+            {"$unionWith": {"coll": TIERS[collection][0], "pipeline": list(pipeline)}},
+            {"$sort": {"seq": 1}},
+            {"$limit": limit},
+        ]
+    async for doc in db[collection].aggregate(pipeline):
+        doc["_id"] = to_str_id(doc["_id"])
+        doc.pop("user_id", None)
+        doc.pop("merged_ids", None)
+        yield doc
+
+
+@router.get("/")
+async def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    current_user=Depends(get_current_user),
+):
+    """
+    Pantry, meal, weight and daily-log documents changed after the `since`
+    token, plus the ids of deleted ones, in seq order. Without `since`, every
+    document is returned. Store the returned `token` and pass it as `since`
+    next time; while `has_more` is true, call again right away. A token only
+    applies to the user it was issued to. `reset` means the old token could
+    not be honored and the client must replace its local copy with this
+    (full) result.
+    """
+    user_id = to_object_id(current_user["_id"])
+    owner = to_str_id(user_id)
+    now = datetime.utcnow()
+    upper = safe_seq(current_user, now)
+
+    after, reset = 0, False
+    if since:
+        try:
+            token_owner, after, issued = decode_token(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid sync token.")
+        if (
+            token_owner != owner
+            or after > current_user.get("sync_seq", 0)
+            or issued < now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)
+        ):
+            # Another user's token, an unknown seq, or tombstones since then may have expired.
+            after, reset = 0, True
+
+    response = {"changes": {c: [] for c in SYNC_COLLECTIONS}, "deleted": [], "has_more": False, "reset": reset}
+    if after >= upper and not reset:
+        # Nothing committed since the last sync; the user document already told us.
+        response["token"] = encode_token(owner, after, now)
+        return response
+
+    candidates = []
+    for collection in SYNC_COLLECTIONS:
+        async for doc in _changed(collection, user_id, after, upper, limit + 1):
+            candidates.append((doc["seq"], collection, doc))
+    if after:
+        cursor = (
+            db[TOMBSTONES_COLLECTION]
+            .find({"user_id": user_id, "seq": {"$gt": after, "$lte": upper}}, {"seq": 1, "collection": 1, "doc_id": 1})
+            .sort("seq", 1)
+            .limit(limit + 1)
+        )
+        async for tombstone in cursor:
+            candidates.append((tombstone["seq"], None, tombstone))
+
+    candidates.sort(key=lambda c: c[0])
+    page = candidates[:limit]
+    response["has_more"] = len(candidates) > limit
+    for seq, collection, doc in page:
+        if collection is None:
+            response["deleted"].append({"collection": doc["collection"], "_id": to_str_id(doc["doc_id"]), "seq": seq})
+        else:
+            response["changes"][collection].append(doc)
+    last_seq = page[-1][0] if response["has_more"] else max(upper, after)
+    response["token"] = encode_token(owner, last_seq, now)
+    return response
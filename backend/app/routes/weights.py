@@ -5,23 +5,40 @@ from app.db import db
 from app.utils import to_object_id, to_str_id
 from ..services.auth_service import get_current_user
 from ..models.weight import WeightCreate
+from ..events import publish
+from ..sync import reserve_seq
+from ..versioning import bump_version
+from ..services.trend_service import (
+    cache_trend,
+    compute_weight_trend,
+    get_cached_trend,
+    invalidate_trend,
+    parse_measured_at,
+)
 
 router = APIRouter()
 
 @router.post("/")
 async def add_weight(payload: WeightCreate, current_user=Depends(get_current_user)):
+    user_id = to_object_id(current_user["_id"])
+    seq = await reserve_seq(user_id)
     doc = {
-        "user_id": to_object_id(current_user["_id"]),
+        "user_id": user_id,
         "weight": payload.weight,
         "measuredAt": payload.measuredAt,
-        "createdAt": datetime.utcnow()
+        "createdAt": datetime.utcnow(),
+        "seq": seq,
     }
     res = await db.weights.insert_one(doc)
-    return {
+    await bump_version(user_id, release_seq=seq)
+    await invalidate_trend(to_str_id(current_user["_id"]))
+    created = {
         "_id": to_str_id(res.inserted_id),
         "weight": payload.weight,
         "measuredAt": payload.measuredAt
     }
+    await publish(current_user["_id"], "weight", created)
+    return created
 
 @router.get("/")
 async def get_weights(current_user=Depends(get_current_user)):
@@ -35,4 +52,29 @@ async def get_weights(current_user=Depends(get_current_user)):
             "measuredAt": doc.get("measuredAt"),
             "createdAt": doc.get("createdAt")
         })
-    return weights
\ No newline at end of file
+    return weights
+
+@router.get("/trend")
+async def get_weight_trend(current_user=Depends(get_current_user)):
+    """
+    Smoothed weight trend, robust weekly rate of change, outlier flags and the
+    projected date for reaching the goal's target_weight. Cached per user.
+    """
+    user_key = to_str_id(current_user["_id"])
+    cached = await get_cached_trend(user_key)
+    if cached is not None:
+        return cached
+
+    user_id = to_object_id(current_user["_id"])
+    cursor = db.weights.find({"user_id": user_id}, {"_id": 0, "weight": 1, "measuredAt": 1, "createdAt": 1})
+    measured, values = [], []
+    async for doc in cursor:
+        measured.append(parse_measured_at(doc.get("measuredAt"), doc["createdAt"]))
+        values.append(doc["weight"])
+
+    goal_doc = await db.goals.find_one({"user_id": user_id}, {"target_weight": 1})
+    target_weight = goal_doc.get("target_weight") if goal_doc else None
+
+    trend = compute_weight_trend(measured, values, target_weight)
+    await cache_trend(user_key, trend)
+    return trend
@@ -0,0 +1,152 @@
+# backend/app/services/admission.py
+import asyncio
+import math
+import time
+from typing import Dict
+from fastapi import Depends, HTTPException, status
+from ..config import settings
+from ..utils import to_str_id
+from .auth_service import get_current_user
+
+# Full buckets of idle users are dropped once this many are tracked.
+MAX_TRACKED_BUCKETS = 10_000
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, rate: float, capacity: float, now: float):
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class AdmissionController:
+    """
+    Guards one AI operation with a per-user token bucket (429 when empty) and a
+    global concurrency limit with a short, bounded wait queue (503 when full or
+    when the wait times out). Both rejections carry a Retry-After header.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = {"admitted": 0, "rejected_rate_limited": 0, "rejected_queue_full": 0, "rejected_queue_timeout": 0}
+
+    def _take_token(self, user_key: str) -> float:
+        """Consume a token; returns 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user_key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[user_key] = TokenBucket(self.burst, now)
+        bucket.refill(self.rate, self.burst, now)
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def _refund_token(self, user_key: str):
+        bucket = self._buckets.get(user_key)
+        if bucket is not None:
+            bucket.tokens = min(self.burst, bucket.tokens + 1)
+
+    def _prune(self, now: float):
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(self.rate, self.burst, now)
+            if bucket.tokens >= self.burst:
+                del self._buckets[key]
+
+    def _reject(self, counter: str, code: int, retry_after: float, detail: str):
+        self.counters[counter] += 1
+        raise HTTPException(
+            status_code=code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def acquire(self, user_key: str):
+        wait = self._take_token(user_key)
+        if wait:
+            self._reject("rejected_rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, wait,
+                         "Too many AI requests, please slow down.")
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self._refund_token(user_key)
+            self._reject("rejected_queue_full", status.HTTP_503_SERVICE_UNAVAILABLE, self.queue_timeout,
+                         "The AI service is busy, please try again shortly.")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._refund_token(user_key)
+            self._reject("rejected_queue_timeout", status.HTTP_503_SERVICE_UNAVAILABLE, self.queue_timeout,
+                         "The AI service is busy, please try again shortly.")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "tracked_users": len(self._buckets),
+            **self.counters,
+        }
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_controller(operation: str) -> AdmissionController:
+    controller = _controllers.get(operation)
+    if controller is None:
+        controller = _controllers[operation] = AdmissionController(
+            operation,
+            rate_per_minute=settings.AI_RATE_PER_MINUTE,
+            burst=settings.AI_BURST,
+            max_concurrency=settings.AI_MAX_CONCURRENCY,
+            max_queue=settings.AI_MAX_QUEUE,
+            queue_timeout=settings.AI_QUEUE_TIMEOUT_SECONDS,
+        )
+    return controller
+
+
+def admission(operation: str):
+    """
+    Route dependency that holds an admission slot for `operation` while the
+    request runs, e.g. `_=Depends(admission("generate_meal_plan"))`.
+    """
+    async def dependency(current_user=Depends(get_current_user)):
+        controller = get_controller(operation)
+        await controller.acquire(to_str_id(current_user["_id"]))
+        try:
+            yield
+        finally:
+            controller.release()
+    return dependency
+
+
+def admission_metrics() -> dict:
+    return {name: controller.stats() for name, controller in _controllers.items()}
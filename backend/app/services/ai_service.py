@@ -1,45 +1,81 @@
 # backend/app/services/ai_service.py
 
 import os
-import google.generativeai as genai
 import json
-from typing import List, Dict
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional
+from ..config import settings
+from ..profiling import phase
+from .prompt_builder import (
+    CALORIE_INSTRUCTIONS,
+    MEAL_PLAN_INSTRUCTIONS,
+    build_calorie_prompt,
+    build_meal_plan_prompt,
+    estimate_tokens,
+)
 
-# Configure the Gemini API client
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in environment variables.")
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash-latest')
+LOG = logging.getLogger("ai_service")
 
-def estimate_calories(description: str) -> dict:
+MODEL_NAME = 'gemini-1.5-flash-latest'
+
+# Prompt/response token counts per operation, reported under GET /metrics.
+# Calls run in the threadpool, hence the lock.
+_usage: Dict[str, Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def get_model(system_instruction: Optional[str] = None):
     """
-    Estimates nutritional information for a meal description using the Gemini API.
+    Configures the Gemini SDK and builds a model on first use, one per system
+    instruction, so the static instructions are set once instead of being
+    resent inside every prompt. The SDK import is deferred so that importing
+    this module stays cheap.
     """
-    prompt = f"""
-    Analyze the following meal description and provide its estimated nutritional information.
-    The meal is: "{description}"
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables.")
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(MODEL_NAME, system_instruction=system_instruction)
+
+def _record_usage(operation: str, prompt: str, response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    with _usage_lock:
+        stats = _usage.setdefault(operation, {"calls": 0, "prompt_tokens": 0, "response_tokens": 0, "estimated_prompt_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["response_tokens"] += response_tokens
+        stats["estimated_prompt_tokens"] += estimate_tokens(prompt)
+    LOG.info("%s: prompt_tokens=%s response_tokens=%s", operation, prompt_tokens, response_tokens)
 
-    Return the data ONLY as a JSON object with these exact keys:
-    - "calories" (number)
-    - "protein" (number, in grams)
-    - "carbs" (number, in grams)
-    - "fat" (number, in grams)
-    - "fiber" (number, in grams)
+def ai_usage_metrics() -> Dict[str, Dict[str, int]]:
+    with _usage_lock:
+        return {operation: dict(stats) for operation, stats in _usage.items()}
 
-    If a value cannot be determined, use 0. Do not include any text, explanation, or markdown formatting like ```json ... ``` outside of the JSON object itself.
+def _generate_json(operation: str, system_instruction: str, prompt: str) -> Dict:
+    with phase("ai"):
+        response = get_model(system_instruction).generate_content(prompt)
+    _record_usage(operation, prompt, response)
+    content = response.text
+
+    # Clean the response to ensure it's a valid JSON object
+    if '```json' in content:
+        start = content.find('{')
+        end = content.rfind('}') + 1
+        content = content[start:end]
+
+    return json.loads(content)
+
+def estimate_calories(description: str) -> dict:
+    """
+    Estimates nutritional information for a meal description using the Gemini API.
     """
     try:
-        response = model.generate_content(prompt)
-        content = response.text
-        
-        if '```json' in content:
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            content = content[start:end]
-
-        nutrition_data = json.loads(content)
-        return nutrition_data
+        return _generate_json("estimate_calories", CALORIE_INSTRUCTIONS, build_calorie_prompt(description))
     except Exception as e:
         print(f"An unexpected error occurred while calling Gemini API for calorie estimation: {e}")
         return {"calories": 0, "protein": 0, "carbs": 0, "fat": 0, "fiber": 0}
@@ -49,47 +85,23 @@ def generate_meal_plan(
     goal: str,
     current_weight: float,
     grocery_list: List[str],
-    recent_macros: Dict
+    recent_macros: Optional[Dict] = None,
+    fallback: bool = True,
 ) -> Dict:
     """
     Generates a personalized one-day meal plan using the Gemini API, considering user data and available ingredients.
+    `grocery_list` should be ordered most recently added first; only as much of it as
+    fits in the pantry token budget is sent.
+    With `fallback=False` a failed call raises instead of returning a generic plan.
     """
-    # Create a detailed prompt with all the user's context
-    prompt = f"""
-    You are a nutrition assistant. Create a simple one-day meal plan (breakfast, lunch, dinner) for a user with the following details:
-    - Goal: {goal}
-    - Current Weight: {current_weight} kg
-    - Recent Average Macros: {json.dumps(recent_macros)}
-    - Ingredients available at home (pantry): {', '.join(grocery_list) if grocery_list else 'None'}
-
-    Instructions:
-    1. Prioritize using the ingredients from the pantry list.
-    2. If you need ingredients that are NOT in the pantry, list them in a "shopping_list".
-    3. If all ingredients are in the pantry, the "shopping_list" should be an empty list [].
-    4. Provide simple, healthy, and easy-to-make meal ideas.
-    5. Return the response ONLY as a single, valid JSON object with no other text or markdown.
-
-    The JSON object must have this exact structure:
-    {{
-      "breakfast": "...",
-      "lunch": "...",
-      "dinner": "...",
-      "shopping_list": ["item 1", "item 2", ...]
-    }}
-    """
+    prompt = build_meal_plan_prompt(
+        goal, current_weight, grocery_list, recent_macros, settings.PROMPT_PANTRY_TOKEN_BUDGET
+    )
     try:
-        response = model.generate_content(prompt)
-        content = response.text
-
-        # Clean the response to ensure it's a valid JSON object
-        if '```json' in content:
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            content = content[start:end]
-
-        plan_data = json.loads(content)
-        return plan_data
+        return _generate_json("generate_meal_plan", MEAL_PLAN_INSTRUCTIONS, prompt)
     except Exception as e:
+        if not fallback:
+            raise
         print(f"An unexpected error occurred while calling Gemini API for meal generation: {e}")
         # Return a fallback plan in case of an error
         return {
@@ -102,5 +114,5 @@ def generate_meal_plan(
 
 async def get_chatbot_response(message: str, history: list) -> str:
     """Placeholder for a Gemini-powered chatbot response."""
-    # This can be fully implemented later using the same 'model.generate_content' method
+    # This can be fully implemented later using the same 'get_model().generate_content' method
     return "I am a helpful assistant powered by Google Gemini!"
@@ -0,0 +1,260 @@
+# backend/app/services/archive.py
+"""
+Hot/cold tiering for meals and daily logs.
+
+Once a day the archival job moves documents older than ARCHIVE_AFTER_DAYS from
+`meals` / `daily_logs` into `meals_archive` / `daily_logs_archive`. Those are
+created with a stronger WiredTiger block compressor and have their own indexes,
+so the hot collections and their indexes only hold recent data.
+
+Each tier records an `archived_before` watermark in `archive_state` before any
+document moves. Readers query the archive only when the requested range starts
+before that watermark; `iter_tiers()` and `find_one_across_tiers()` hide the split.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from ..config import settings
+from ..db import db
+from ..sync import record_deletes, reserve_seq
+from ..versioning import bump_version
+from .jobs import acquire_lease, finish_job
+
+LOG = logging.getLogger("archive")
+
+STATE_COLLECTION = "archive_state"
+LEASE_SECONDS = 3600
+# Watermarks are re-read from the database at most this often per worker.
+WATERMARK_TTL_SECONDS = 60
+
+# Hot collection -> (archive collection, time field)
+TIERS = {
+    "meals": ("meals_archive", "createdAt"),
+    "daily_logs": ("daily_logs_archive", "date"),
+}
+
+_watermarks: Dict[str, tuple] = {}
+_stats = {"runs": 0, "moved": {name: 0 for name in TIERS}, "last_cutoff": None, "last_finished_at": None}
+
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    today = (now or datetime.utcnow()).date()
+    return datetime.combine(today - timedelta(days=settings.ARCHIVE_AFTER_DAYS), datetime.min.time())
+
+
+async def ensure_archive_collections():
+    """Create the archive collections with ARCHIVE_BLOCK_COMPRESSOR, plus their indexes."""
+    existing = set(await db.list_collection_names(filter={"name": {"$in": [a for a, _ in TIERS.values()]}}))
+    for archive, _ in TIERS.values():
+        if archive in existing:
+            continue
+        try:
+            await db.create_collection(
+                archive,
+                storageEngine={"wiredTiger": {"configString": f"block_compressor={settings.ARCHIVE_BLOCK_COMPRESSOR}"}},
+            )
+        except CollectionInvalid:
+            # Another worker created it first.
+            pass
+
+    await db.meals_archive.create_index(
+        [("user_id", ASCENDING), ("createdAt", DESCENDING)], name="meals_archive_user_createdAt_desc_idx"
+    )
+    # Delta sync (GET /sync) reads archived documents by seq as well.
+    await db.meals_archive.create_index([("user_id", ASCENDING), ("seq", ASCENDING)], name="meals_archive_user_seq_idx")
+    await db.daily_logs_archive.create_index(
+        [("user_id", ASCENDING), ("seq", ASCENDING)], name="daily_logs_archive_user_seq_idx"
+    )
+    # One archived log per user and day; later moves of the same day are merged into it.
+    await db.daily_logs_archive.create_index(
+        [("user_id", ASCENDING), ("date", DESCENDING)], unique=True, name="daily_logs_archive_user_date_desc_idx"
+    )
+
+
+async def archived_before(collection: str) -> Optional[datetime]:
+    """The collection's watermark: documents older than this may live in the archive."""
+    cached = _watermarks.get(collection)
+    now = time.monotonic()
+    if cached and now - cached[1] < WATERMARK_TTL_SECONDS:
+        return cached[0]
+    state = await db[STATE_COLLECTION].find_one({"_id": collection})
+    watermark = state.get("archived_before") if state else None
+    _watermarks[collection] = (watermark, now)
+    return watermark
+
+
+async def reaches_archive(collection: str, since: Optional[datetime]) -> bool:
+    watermark = await archived_before(collection)
+    return watermark is not None and (since is None or since < watermark)
+
+
+async def iter_tiers(collection: str, query: dict, since: Optional[datetime] = None, direction: int = ASCENDING,
+                     projection: Optional[dict] = None, batch_size: Optional[int] = None):
+    """
+    Yield documents matching `query` from the hot collection and, when `since`
+    reaches past the watermark, from its archive too. Results are sorted on the
+    tier's time field within each tier, and the tiers are read oldest first for
+    ascending order and newest first for descending order.
+    """
+    archive, time_field = TIERS[collection]
+    names = [archive, collection] if direction == ASCENDING else [collection, archive]
+    if not await reaches_archive(collection, since):
+        names.remove(archive)
+    if since is not None:
+        query = {**query, time_field: {"$gte": since}}
+    for name in names:
+        cursor = db[name].find(query, projection).sort(time_field, direction)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        async for doc in cursor:
+            doc.pop("merged_ids", None)
+            yield doc
+
+
+async def find_one_across_tiers(collection: str, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+    doc = await db[collection].find_one(query, projection)
+    if doc is None and await reaches_archive(collection, None):
+        doc = await db[TIERS[collection][0]].find_one(query, projection)
+    return doc
+
+
+def _archive_op(collection: str, doc: dict, seq: Optional[int] = None):
+    if collection == "daily_logs":
+        # A day imported after its log was archived arrives as a second hot log;
+        # fold it into the archived one. `merged_ids` keeps a retried move from
+        # counting the same log twice: the filter misses and the upsert then
+        # fails on the unique (user_id, date) index, which is ignored.
+        update = {"$push": {"merged_ids": doc["_id"]}, "$setOnInsert": {"_id": doc["_id"]}}
+        seq = seq if seq is not None else doc.get("seq")
+        if seq is not None:
+            update["$max"] = {"seq": seq}
+        totals = doc.get("totals") or {}
+        if totals:
+            update["$inc"] = {f"totals.{key}": value for key, value in totals.items()}
+        return UpdateOne(
+            {"user_id": doc["user_id"], "date": doc["date"], "merged_ids": {"$ne": doc["_id"]}},
+            update,
+            upsert=True,
+        )
+    return ReplaceOne({"_id": doc["_id"]}, doc, upsert=True)
+
+
+async def _daily_log_merges(docs: List[dict]) -> List[dict]:
+    """
+    Hot daily logs that will be folded into another log of the same day: one
+    already archived, or an earlier one in the same batch.
+    """
+    archived = set()
+    cursor = db.daily_logs_archive.find(
+        {"$or": [{"user_id": doc["user_id"], "date": doc["date"]} for doc in docs]}, {"user_id": 1, "date": 1}
+    )
+    async for doc in cursor:
+        archived.add((doc["user_id"], doc["date"]))
+    merges = []
+    for doc in docs:
+        key = (doc["user_id"], doc["date"])
+        if key in archived:
+            merges.append(doc)
+        archived.add(key)
+    return merges
+
+
+async def _reserve_merge_seqs(merges: List[dict]):
+    """
+    A merge changes the archived log and removes the hot log's `_id`, so delta
+    sync needs a fresh seq for the merged document and a tombstone for the
+    hot one. Reserves both per user: returns ({hot _id: merged seq},
+    {user_id: (first reserved seq, hot logs)}).
+    """
+    by_user = defaultdict(list)
+    for doc in merges:
+        by_user[doc["user_id"]].append(doc)
+    merge_seqs, reserved = {}, {}
+    for user_id, user_docs in by_user.items():
+        first = await reserve_seq(user_id, 2 * len(user_docs))
+        reserved[user_id] = (first, user_docs)
+        for i, doc in enumerate(user_docs):
+            merge_seqs[doc["_id"]] = first + i
+    return merge_seqs, reserved
+
+
+async def archive_collection(collection: str, cutoff: datetime) -> int:
+    """Move documents older than `cutoff` into the archive, one throttled batch at a time."""
+    archive, time_field = TIERS[collection]
+    # Raise the watermark first, so readers look in the archive before anything lands there.
+    previous = await db[STATE_COLLECTION].find_one_and_update(
+        {"_id": collection}, {"$max": {"archived_before": cutoff}}, upsert=True
+    )
+    _watermarks.pop(collection, None)
+    if not previous or previous.get("archived_before") is None or previous["archived_before"] < cutoff:
+        # Let other workers' cached watermarks expire before the first document moves.
+        await asyncio.sleep(WATERMARK_TTL_SECONDS)
+
+    moved = 0
+    while True:
+        docs: List[dict] = await (
+            db[collection].find({time_field: {"$lt": cutoff}})
+            .sort(time_field, ASCENDING)
+            .limit(settings.ARCHIVE_BATCH_SIZE)
+            .to_list(length=settings.ARCHIVE_BATCH_SIZE)
+        )
+        if not docs:
+            break
+        merge_seqs, reserved = {}, {}
+        if collection == "daily_logs":
+            merge_seqs, reserved = await _reserve_merge_seqs(await _daily_log_merges(docs))
+        try:
+            await db[archive].bulk_write(
+                [_archive_op(collection, doc, merge_seqs.get(doc["_id"])) for doc in docs], ordered=False
+            )
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        for user_id, (first, user_docs) in reserved.items():
+            await record_deletes(user_id, collection, [doc["_id"] for doc in user_docs], first + len(user_docs))
+        # Copied (or already merged) first, deleted second: a crash in between only repeats work.
+        await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        # Cached GET responses may describe documents that just moved (or merged).
+        for user_id in {doc["user_id"] for doc in docs}:
+            await bump_version(user_id, collection, release_seq=reserved[user_id][0] if user_id in reserved else None)
+        moved += len(docs)
+        _stats["moved"][collection] += len(docs)
+        await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+    return moved
+
+
+async def run_once(now: Optional[datetime] = None) -> bool:
+    """Archive every tier once per day; returns True if this worker did the run."""
+    now = now or datetime.utcnow()
+    job_id = f"archive:{now.date().isoformat()}"
+    if not await acquire_lease(job_id, now, LEASE_SECONDS):
+        return False
+    cutoff = archive_cutoff(now)
+    moved = {collection: await archive_collection(collection, cutoff) for collection in TIERS}
+    LOG.info("Archived documents older than %s: %s", cutoff.date(), moved)
+    await finish_job(job_id, moved=moved)
+    _stats["runs"] += 1
+    _stats["last_cutoff"] = cutoff.isoformat()
+    _stats["last_finished_at"] = datetime.utcnow().isoformat()
+    return True
+
+
+async def archive_loop():
+    """Runs until cancelled. Errors are logged and retried on the next tick."""
+    while True:
+        try:
+            await run_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            LOG.exception("Archival run failed")
+        await asyncio.sleep(settings.ARCHIVE_CHECK_INTERVAL_SECONDS)
+
+
+def archive_metrics() -> dict:
+    return {**_stats, "moved": dict(_stats["moved"])}
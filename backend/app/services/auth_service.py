@@ -6,6 +6,7 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from app.db import db
 from app.utils import to_object_id
+from app.profiling import phase
 import os
 
 # JWT settings
@@ -41,20 +42,24 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 # User utilities
 # -------------------------------
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await get_user_from_token(token)
+
+async def get_user_from_token(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    with phase("auth"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = await db.users.find_one({"_id": to_object_id(user_id)})
+
+        user = await db.users.find_one({"_id": to_object_id(user_id)})
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
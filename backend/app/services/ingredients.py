@@ -0,0 +1,183 @@
+# backend/app/services/ingredients.py
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Words that describe how an ingredient is bought or prepared, not what it is.
+DESCRIPTORS = {
+    "fresh", "organic", "frozen", "canned", "tinned", "dried", "raw", "ripe",
+    "chopped", "diced", "sliced", "minced", "grated", "shredded", "peeled",
+    "large", "small", "medium", "whole", "boneless", "skinless", "lean",
+    "low-fat", "lowfat", "unsalted", "salted", "plain", "free-range",
+}
+
+# Units and quantities that show up in AI-generated shopping lists ("2 lbs chicken").
+UNITS = {
+    "g", "kg", "gram", "grams", "lb", "lbs", "pound", "pounds", "oz", "ounce", "ounces",
+    "ml", "l", "litre", "liter", "litres", "liters", "cup", "cups", "tbsp", "tsp",
+    "pack", "packs", "packet", "packets", "can", "cans", "bag", "bags", "bunch", "bunches",
+    "of", "a", "an", "some",
+}
+
+# Singular phrase -> canonical phrase.
+SYNONYMS = {
+    "roma tomato": "tomato",
+    "plum tomato": "tomato",
+    "vine tomato": "tomato",
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "garbanzo bean": "chickpea",
+    "garbanzo": "chickpea",
+    "courgette": "zucchini",
+    "aubergine": "eggplant",
+    "coriander leaf": "cilantro",
+    "capsicum": "bell pepper",
+    "rocket": "arugula",
+    "prawn": "shrimp",
+    "minced beef": "ground beef",
+    "beef mince": "ground beef",
+    "rolled oat": "oat",
+    "porridge oat": "oat",
+    "oatmeal": "oat",
+    "yoghurt": "yogurt",
+    "greek yoghurt": "greek yogurt",
+    "chicken breast fillet": "chicken breast",
+}
+
+# Plurals the suffix rules below would get wrong.
+IRREGULAR_PLURALS = {
+    "leaves": "leaf",
+    "loaves": "loaf",
+    "halves": "half",
+    "knives": "knife",
+    "geese": "goose",
+    "mice": "mouse",
+}
+UNCHANGED = {
+    "hummus", "asparagus", "couscous", "molasses", "swiss", "citrus", "bass",
+    "grass", "watercress", "quinoa", "rice", "tofu", "series", "species",
+}
+
+_NON_ALPHA = re.compile(r"[^a-z\s-]")
+_SPACES = re.compile(r"\s+")
+
+FUZZY_THRESHOLD = 0.8
+FUZZY_MIN_LENGTH = 4
+
+
+def singularize(word: str) -> str:
+    if word in UNCHANGED or len(word) <= 3:
+        return word
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "xes", "sses", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize(name: str) -> str:
+    """
+    Canonical form of an ingredient name: lowercase, no quantities, units or
+    preparation words, singular, with synonyms folded. "2 lbs Roma Tomatoes"
+    and "tomato" both become "tomato".
+    """
+    text = _SPACES.sub(" ", _NON_ALPHA.sub(" ", name.lower())).strip()
+    words = [singularize(w) for w in text.split(" ") if w and w not in DESCRIPTORS and w not in UNITS]
+    phrase = " ".join(words)
+    if phrase in SYNONYMS:
+        return SYNONYMS[phrase]
+    # Fold a synonym on the trailing words as well ("organic roma tomato" is already
+    # reduced above, but "ripe vine tomato" only matches on its last two words).
+    for size in (2, 1):
+        tail = " ".join(words[-size:])
+        if len(words) > size and tail in SYNONYMS:
+            return " ".join(words[:-size] + [SYNONYMS[tail]])
+    return phrase or name.strip().lower()
+
+
+def food_id(name: str) -> str:
+    """Stable identifier stored on grocery documents, e.g. "green_onion"."""
+    return normalize(name).replace(" ", "_").replace("-", "_")
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _compact(fid: str) -> str:
+    return fid.replace("_", "")
+
+
+def _contains_tokens(a: str, b: str) -> bool:
+    """Every word of the shorter food id appears in the longer one ("chick_pea" in "chickpea")."""
+    shorter, longer = sorted((a, b), key=len)
+    return all(token in _compact(longer) for token in shorter.split("_") if token)
+
+
+class IngredientIndex:
+    """
+    Exact lookup by food id plus a trigram inverted index for fuzzy matches
+    ("tomatoe", "chick pea"). Build it once per pantry and reuse it for every
+    item in a shopping list.
+
+    Only exact matches are the same ingredient. A fuzzy match is a likely typo
+    or spacing variant, good enough to point out but never to merge on: "potato"
+    and "sweet potato" are different things on a shopping list.
+    """
+
+    def __init__(self, food_ids: Iterable[str] = ()):
+        self._exact: Set[str] = set()
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        for fid in food_ids:
+            self.add(fid)
+
+    def add(self, fid: str):
+        if fid in self._exact:
+            return
+        self._exact.add(fid)
+        grams = trigrams(_compact(fid))
+        self._grams[fid] = grams
+        for gram in grams:
+            self._postings[gram].add(fid)
+
+    def exact(self, name: str) -> Optional[str]:
+        """Food id of `name` if the pantry already has that ingredient, else None."""
+        fid = food_id(name)
+        return fid if fid in self._exact else None
+
+    def match(self, name: str) -> Optional[str]:
+        """Food id of the best pantry match for `name`, exact or fuzzy, or None."""
+        fid = food_id(name)
+        if fid in self._exact:
+            return fid
+        if len(fid) < FUZZY_MIN_LENGTH:
+            return None
+        grams = trigrams(_compact(fid))
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+        best: Tuple[float, Optional[str]] = (0.0, None)
+        for candidate, count in shared.items():
+            # Dice coefficient over trigram sets.
+            score = 2 * count / (len(grams) + len(self._grams[candidate]))
+            if score > best[0] and _contains_tokens(fid, candidate):
+                best = (score, candidate)
+        return best[1] if best[0] >= FUZZY_THRESHOLD else None
+
+
+def dedupe(names: Iterable[str]) -> List[str]:
+    """Drop names that normalize to an ingredient already seen, keeping the first spelling."""
+    seen, unique = set(), []
+    for name in names:
+        fid = food_id(name)
+        if fid not in seen:
+            seen.add(fid)
+            unique.append(name)
+    return unique
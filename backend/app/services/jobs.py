@@ -0,0 +1,33 @@
+# backend/app/services/jobs.py
+"""
+Run-once leases for background jobs shared by several workers.
+
+A job is a document in `scheduler_jobs`. The worker that claims it holds a
+lease until `leased_until`; if it dies, another worker can claim the job once
+the lease has expired. Finished jobs are never claimed again.
+"""
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from ..db import db
+
+JOBS_COLLECTION = "scheduler_jobs"
+
+
+async def acquire_lease(job_id: str, now: datetime, lease_seconds: float) -> bool:
+    """Claim `job_id` unless it is finished or another worker holds a live lease."""
+    try:
+        await db[JOBS_COLLECTION].find_one_and_update(
+            {"_id": job_id, "status": {"$ne": "done"}, "leased_until": {"$lt": now}},
+            {"$set": {"status": "running", "leased_until": now + timedelta(seconds=lease_seconds)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The job exists and is done or leased; the upsert lost.
+        return False
+    return True
+
+
+async def finish_job(job_id: str, **fields) -> None:
+    await db[JOBS_COLLECTION].update_one(
+        {"_id": job_id}, {"$set": {"status": "done", "finished_at": datetime.utcnow(), **fields}}
+    )
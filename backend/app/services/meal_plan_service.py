@@ -0,0 +1,64 @@
+# backend/app/services/meal_plan_service.py
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from ..config import settings
+from ..db import db
+from ..models.meal_plan import PlannedMeal
+from .ai_service import generate_meal_plan
+from .ingredients import dedupe
+
+
+def new_meal_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def next_version():
+    """Pipeline expression for version + 1; plans written before versioning count as 0."""
+    return {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+
+
+def upcoming_week_start(today: Optional[date] = None) -> date:
+    """The Monday after `today` (a week ahead when `today` is itself a Monday)."""
+    today = today or datetime.utcnow().date()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def plan_expires_at(week_start: str, now: Optional[datetime] = None) -> datetime:
+    """
+    When the meal_plans TTL index may delete a plan: MEAL_PLAN_TTL_SECONDS after
+    it was written, or, with MEAL_PLAN_KEEP_UNTIL_WEEK_END, not before the end
+    of its week, whichever is later.
+    """
+    now = now or datetime.utcnow()
+    expires = now + timedelta(seconds=settings.MEAL_PLAN_TTL_SECONDS)
+    if settings.MEAL_PLAN_KEEP_UNTIL_WEEK_END:
+        try:
+            week_end = datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=7)
+        except ValueError:
+            # Not a YYYY-MM-DD week; only the plain TTL applies.
+            return expires
+        expires = max(expires, week_end)
+    return expires
+
+
+async def generate_plan_meals(user_id, week_start: str, fallback: bool = True) -> List[dict]:
+    """
+    Ask the AI for a day of meals for `week_start`, based on the user's goal, weight and pantry.
+    With `fallback=False` an AI failure raises instead of yielding a generic plan.
+    """
+    latest_weight_doc = await db.weights.find_one({"user_id": user_id}, sort=[("createdAt", -1)])
+    goal_doc = await db.goals.find_one({"user_id": user_id})
+    current_weight = latest_weight_doc.get("weight") if latest_weight_doc else 75
+    goal = goal_doc.get("goal_type") if goal_doc else "maintenance"
+
+    grocery_cursor = db.grocery.find({"user_id": user_id, "status": "in_stock"}, {"name": 1}).sort("createdAt", -1)
+    in_stock_items = dedupe([doc["name"] async for doc in grocery_cursor])
+
+    ai_plan = await run_in_threadpool(generate_meal_plan, goal, current_weight, in_stock_items, fallback=fallback)
+
+    return [
+        PlannedMeal(meal_id=new_meal_id(), date=week_start, mealType=meal_type, name=ai_plan.get(meal_type, "N/A")).dict()
+        for meal_type in ("breakfast", "lunch", "dinner")
+    ]
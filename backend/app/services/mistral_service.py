@@ -1,12 +1,15 @@
 # app/services/mistral_service.py
 
 import os
-from mistralai import Mistral
 import json
+from functools import lru_cache
+from ..profiling import phase
 
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-
-client = Mistral(api_key=MISTRAL_API_KEY)
+@lru_cache(maxsize=1)
+def get_client():
+    """Builds the Mistral client on first use instead of at import time."""
+    from mistralai import Mistral
+    return Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
 
 # --- (existing estimate_calories and generate_meal_plan functions remain here) ---
 # ... existing code ...
@@ -27,10 +30,11 @@ async def get_chatbot_response(message: str, history: list) -> str:
     messages = [system_prompt] + history + [{"role": "user", "content": message}]
 
     try:
-        response = client.chat.complete(
-            model="mistral-large-latest",
-            messages=messages
-        )
+        with phase("ai"):
+            response = get_client().chat.complete(
+                model="mistral-large-latest",
+                messages=messages
+            )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error calling Mistral for chatbot: {e}")
@@ -0,0 +1,165 @@
+# backend/app/services/pregeneration.py
+"""
+Off-peak pre-generation of next week's meal plans.
+
+A loop started at app startup wakes every PREGEN_CHECK_INTERVAL_SECONDS. Inside
+the off-peak window (UTC hours), and once the coming Monday is at most
+PREGEN_LEAD_DAYS away, it generates plans for users who logged food within the
+last PREGEN_ACTIVE_DAYS days and have no plan for that week yet. Generation
+runs on PREGEN_CONCURRENCY workers, paced to PREGEN_RATE_PER_MINUTE AI calls,
+so the Monday-morning GET /meal-plans/{week} is a plain read.
+
+With several workers, a lease document in `scheduler_jobs` makes sure only one
+of them processes a given week. A worker that dies mid-run loses its lease after
+PREGEN_LEASE_SECONDS; the next run skips users who already have a plan.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from ..config import settings
+from ..db import db
+from ..versioning import bump_version
+from .admission import TokenBucket
+from .jobs import acquire_lease, finish_job
+from .meal_plan_service import generate_plan_meals, plan_expires_at, upcoming_week_start
+
+LOG = logging.getLogger("pregeneration")
+
+_stats = {"runs": 0, "generated": 0, "skipped": 0, "failed": 0, "last_week": None, "last_finished_at": None}
+
+
+class RateLimiter:
+    """Async pacing on a token bucket: `wait()` returns once a call is allowed."""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._bucket = TokenBucket(burst, time.monotonic())
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            while True:
+                self._bucket.refill(self.rate, self.burst, time.monotonic())
+                if self._bucket.tokens >= 1:
+                    self._bucket.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._bucket.tokens) / self.rate)
+
+
+def in_off_peak_window(now: datetime) -> bool:
+    start, end = settings.PREGEN_WINDOW_START_HOUR, settings.PREGEN_WINDOW_END_HOUR
+    if start <= end:
+        return start <= now.hour < end
+    # The window wraps midnight, e.g. 22 -> 5.
+    return now.hour >= start or now.hour < end
+
+
+async def active_users_without_plan(week_start: str):
+    """Users with a daily log in the last PREGEN_ACTIVE_DAYS days and no plan for `week_start`."""
+    since = datetime.combine(datetime.utcnow().date() - timedelta(days=settings.PREGEN_ACTIVE_DAYS), datetime.min.time())
+    active = [
+        doc["_id"]
+        async for doc in db.daily_logs.aggregate([
+            {"$match": {"date": {"$gte": since}}},
+            {"$group": {"_id": "$user_id"}},
+        ])
+    ]
+    planned = set(await db.meal_plans.distinct("user_id", {"weekStart": week_start, "user_id": {"$in": active}}))
+    return [user_id for user_id in active if user_id not in planned]
+
+
+async def pregenerate_plan(user_id, week_start: str) -> bool:
+    """
+    Generate and store one plan. The write only inserts: a plan the user made
+    while this one was being generated is kept. Returns True if stored.
+    An AI failure raises: storing the generic fallback plan would keep it as
+    the user's plan for the whole week.
+    """
+    meals = await generate_plan_meals(user_id, week_start, fallback=False)
+    now = datetime.utcnow()
+    result = await db.meal_plans.update_one(
+        {"user_id": user_id, "weekStart": week_start},
+        {"$setOnInsert": {
+            "user_id": user_id,
+            "weekStart": week_start,
+            "meals": meals,
+            "createdAt": now,
+            "expiresAt": plan_expires_at(week_start, now),
+            "pregenerated": True,
+            "version": 1,
+        }},
+        upsert=True,
+    )
+    if result.upserted_id is None:
+        return False
+    await bump_version(user_id, "meal_plans")
+    return True
+
+
+async def run_pregeneration(week_start: str):
+    """Pre-generate `week_start` plans for every eligible user with a bounded worker pool."""
+    user_ids = await active_users_without_plan(week_start)
+    LOG.info("Pre-generating %d meal plans for week %s", len(user_ids), week_start)
+    queue: asyncio.Queue = asyncio.Queue()
+    for user_id in user_ids:
+        queue.put_nowait(user_id)
+    limiter = RateLimiter(settings.PREGEN_RATE_PER_MINUTE)
+
+    async def worker():
+        while True:
+            try:
+                user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await limiter.wait()
+            try:
+                _stats["generated" if await pregenerate_plan(user_id, week_start) else "skipped"] += 1
+            except Exception:
+                _stats["failed"] += 1
+                LOG.exception("Pre-generation failed for user %s", user_id)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, settings.PREGEN_CONCURRENCY))))
+
+
+async def run_once(now: Optional[datetime] = None) -> bool:
+    """One scheduler tick; returns True if it processed a week."""
+    now = now or datetime.utcnow()
+    if not in_off_peak_window(now):
+        return False
+    week = upcoming_week_start(now.date())
+    if (week - now.date()).days > settings.PREGEN_LEAD_DAYS:
+        return False
+
+    week_start = week.isoformat()
+    job_id = f"meal_plan_pregen:{week_start}"
+    if not await acquire_lease(job_id, now, settings.PREGEN_LEASE_SECONDS):
+        return False
+
+    await run_pregeneration(week_start)
+    await finish_job(job_id)
+    _stats["runs"] += 1
+    _stats["last_week"] = week_start
+    _stats["last_finished_at"] = datetime.utcnow().isoformat()
+    return True
+
+
+async def scheduler_loop():
+    """Runs until cancelled. Errors are logged and retried on the next tick."""
+    if not settings.GEMINI_API_KEY:
+        LOG.warning("GEMINI_API_KEY is not set; meal-plan pre-generation is disabled")
+        return
+    while True:
+        try:
+            await run_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            LOG.exception("Meal-plan pre-generation tick failed")
+        await asyncio.sleep(settings.PREGEN_CHECK_INTERVAL_SECONDS)
+
+
+def pregeneration_metrics() -> dict:
+    return dict(_stats)
@@ -0,0 +1,94 @@
+# backend/app/services/prompt_builder.py
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+from .ingredients import food_id
+
+# Rough but stable: Gemini averages about four characters per token for English.
+CHARS_PER_TOKEN = 4
+
+# Static instructions are sent once per model as the system instruction instead
+# of being repeated inside every prompt.
+MEAL_PLAN_INSTRUCTIONS = """You are a nutrition assistant. Create a simple one-day meal plan (breakfast, lunch, dinner) for the user described in the message.
+
+Instructions:
+1. Prioritize using the ingredients from the pantry list.
+2. If you need ingredients that are NOT in the pantry, list them in a "shopping_list".
+3. If all ingredients are in the pantry, the "shopping_list" should be an empty list [].
+4. Provide simple, healthy, and easy-to-make meal ideas.
+5. Return the response ONLY as a single, valid JSON object with no other text or markdown.
+
+The JSON object must have this exact structure:
+{"breakfast": "...", "lunch": "...", "dinner": "...", "shopping_list": ["item 1", "item 2", ...]}"""
+
+CALORIE_INSTRUCTIONS = """Analyze the meal description in the message and provide its estimated nutritional information.
+
+Return the data ONLY as a JSON object with these exact keys:
+- "calories" (number)
+- "protein" (number, in grams)
+- "carbs" (number, in grams)
+- "fat" (number, in grams)
+- "fiber" (number, in grams)
+
+If a value cannot be determined, use 0. Do not include any text, explanation, or markdown formatting outside of the JSON object itself."""
+
+# Ingredients that matter most for goals built around protein intake.
+PROTEIN_FOODS = {
+    "chicken_breast", "chicken", "turkey", "egg", "tofu", "tempeh", "lentil", "chickpea",
+    "black_bean", "kidney_bean", "greek_yogurt", "yogurt", "cottage_cheese", "salmon",
+    "tuna", "shrimp", "cod", "ground_beef", "beef", "pork", "paneer", "edamame", "milk",
+}
+PROTEIN_GOALS = ("loss", "lose", "gain", "muscle", "cut", "bulk")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def rank_pantry(names: List[str], goal: Optional[str]) -> List[str]:
+    """
+    Order pantry items by relevance, then recency. `names` must arrive most recent
+    first; the sort is stable, so recency breaks ties within a relevance tier.
+    """
+    if not goal or not any(word in goal.lower() for word in PROTEIN_GOALS):
+        return list(names)
+    return sorted(names, key=lambda name: food_id(name) not in PROTEIN_FOODS)
+
+
+def fit_to_budget(names: List[str], budget_tokens: int) -> Tuple[List[str], int]:
+    """Take names in order until the comma-joined list would exceed the budget."""
+    selected, used = [], 0
+    for name in names:
+        cost = estimate_tokens(name + ", ")
+        if used + cost > budget_tokens:
+            break
+        selected.append(name)
+        used += cost
+    return selected, len(names) - len(selected)
+
+
+def build_meal_plan_prompt(
+    goal: str,
+    current_weight: float,
+    pantry: List[str],
+    recent_macros: Optional[Dict],
+    pantry_budget_tokens: int,
+) -> str:
+    """
+    The per-call part of the meal-plan prompt. The pantry section is capped at
+    `pantry_budget_tokens`, so prompt size stays flat as the pantry grows.
+    """
+    selected, omitted = fit_to_budget(rank_pantry(pantry, goal), pantry_budget_tokens)
+    pantry_line = ", ".join(selected) if selected else "None"
+    if omitted:
+        pantry_line += f" (+{omitted} more)"
+    return "\n".join([
+        f"Goal: {goal}",
+        f"Current Weight: {current_weight} kg",
+        f"Recent Average Macros: {json.dumps(recent_macros or {}, separators=(',', ':'))}",
+        f"Pantry: {pantry_line}",
+    ])
+
+
+def build_calorie_prompt(description: str) -> str:
+    return f'The meal is: "{description}"'
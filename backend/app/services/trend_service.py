@@ -0,0 +1,142 @@
+# backend/app/services/trend_service.py
+import math
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional
+from ..cache import get_cache
+from ..config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+EWMA_HALFLIFE_DAYS = 7.0
+RATE_WINDOW_DAYS = 56     # robust rate is fitted over the last 8 weeks
+RATE_MAX_POINTS = 300     # caps the O(n^2) pairwise slope computation
+OUTLIER_Z = 3.5
+MAX_PROJECTION_DAYS = 3650  # beyond ten years a projection is meaningless
+
+# Computed trends are cached per user id and dropped whenever the user's series changes.
+TREND_CACHE_NAMESPACE = "weight_trend"
+# With CACHE_BACKEND=memory the drop only reaches the worker that took the write,
+# so other workers' copies must age out quickly instead.
+TREND_MEMORY_TTL_SECONDS = 30
+
+
+async def get_cached_trend(user_id: str) -> Optional[dict]:
+    return await get_cache(TREND_CACHE_NAMESPACE).get(user_id)
+
+
+async def cache_trend(user_id: str, trend: dict) -> None:
+    ttl = TREND_MEMORY_TTL_SECONDS if settings.CACHE_BACKEND == "memory" else None
+    await get_cache(TREND_CACHE_NAMESPACE).set(user_id, trend, ttl)
+
+
+async def invalidate_trend(user_id: str) -> None:
+    await get_cache(TREND_CACHE_NAMESPACE).invalidate(user_id)
+
+
+def parse_measured_at(measured_at: Optional[str], fallback: datetime) -> datetime:
+    """Parse the client-supplied measuredAt string, falling back to createdAt."""
+    try:
+        dt = datetime.fromisoformat(measured_at)
+    except (TypeError, ValueError):
+        dt = fallback
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _ewma(days: "np.ndarray", values: "np.ndarray", halflife: float) -> "np.ndarray":
+    """
+    Time-aware exponentially weighted moving average. Each point j contributes to i
+    with weight exp(-(t_i - t_j) / tau); both sums are accumulated in log space so
+    that multi-year series do not overflow.
+    """
+    import numpy as np
+    tau = halflife / np.log(2)
+    scaled = days / tau
+    num = np.logaddexp.accumulate(scaled + np.log(values))
+    den = np.logaddexp.accumulate(scaled)
+    return np.exp(num - den)
+
+
+def _theil_sen_slope(days: "np.ndarray", values: "np.ndarray") -> Optional[float]:
+    """Median of pairwise slopes, in units per day. Robust to outliers."""
+    import numpy as np
+    if len(days) < 2:
+        return None
+    i, j = np.triu_indices(len(days), k=1)
+    dt = days[j] - days[i]
+    mask = dt > 0
+    if not mask.any():
+        return None
+    return float(np.median((values[j] - values[i])[mask] / dt[mask]))
+
+
+def _outlier_flags(values: "np.ndarray", trend: "np.ndarray") -> "np.ndarray":
+    """Modified z-score of the residuals against the trend (MAD based)."""
+    import numpy as np
+    residuals = values - trend
+    deviation = np.abs(residuals - np.median(residuals))
+    mad = np.median(deviation)
+    if mad == 0:
+        return np.zeros(len(values), dtype=bool)
+    return 0.6745 * deviation / mad > OUTLIER_Z
+
+
+def compute_weight_trend(measured: List[datetime], weights: List[float], target_weight: Optional[float]) -> dict:
+    """
+    Computes the smoothed trend, weekly rate of change, outlier flags and projected
+    goal date for a user's weight series. Inputs need not be sorted.
+    """
+    # numpy is imported here, not at module level, to keep app startup cheap.
+    import numpy as np
+    if not weights:
+        return {"points": [], "weekly_rate": None, "target_weight": target_weight, "projected_goal_date": None}
+
+    stamps = np.array(measured, dtype="datetime64[s]")
+    values = np.asarray(weights, dtype=float)
+    order = np.argsort(stamps, kind="stable")
+    stamps, values = stamps[order], values[order]
+    days = (stamps - stamps[0]).astype(np.float64) / 86400.0
+
+    # Points with a non-positive weight cannot be log-transformed; keep them out of the fit.
+    valid = values > 0
+    trend = np.full(len(values), np.nan)
+    outliers = ~valid
+    if valid.any():
+        trend[valid] = _ewma(days[valid], values[valid], EWMA_HALFLIFE_DAYS)
+        outliers[valid] = _outlier_flags(values[valid], trend[valid])
+
+    inliers = ~outliers
+    recent = inliers & (days >= days[-1] - RATE_WINDOW_DAYS)
+    recent_idx = np.flatnonzero(recent)[-RATE_MAX_POINTS:]
+    slope = _theil_sen_slope(days[recent_idx], values[recent_idx])
+    weekly_rate = round(slope * 7, 3) if slope is not None else None
+
+    projected = None
+    current = trend[inliers][-1] if inliers.any() else None
+    if target_weight is not None and current is not None and slope:
+        remaining = target_weight - current
+        # Only project when the user is actually moving towards the target.
+        days_to_goal = float(remaining / slope)
+        if 0 <= days_to_goal <= MAX_PROJECTION_DAYS:
+            last = stamps[-1].astype(datetime)
+            projected = (last + timedelta(days=days_to_goal)).date().isoformat()
+
+    # Convert whole columns to Python objects once; per-element numpy access is slow.
+    rounded = np.round(trend, 2)
+    points = [
+        {
+            "measuredAt": s.isoformat(),
+            "weight": v,
+            "trend": None if math.isnan(t) else t,
+            "outlier": o,
+        }
+        for s, v, t, o in zip(stamps.astype(datetime).tolist(), values.tolist(), rounded.tolist(), outliers.tolist())
+    ]
+    return {
+        "points": points,
+        "weekly_rate": weekly_rate,
+        "target_weight": target_weight,
+        "projected_goal_date": projected,
+    }
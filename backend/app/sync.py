@@ -0,0 +1,77 @@
+# app/sync.py
+"""
+Per-user change sequence for delta sync (GET /sync).
+
+Every write to a synced collection stamps the written documents with `seq`,
+taken from the user's `sync_seq` counter; deletes leave a tombstone carrying
+the seq instead. A client that remembers the highest seq it has seen can ask
+for everything after it, and the (user_id, seq) indexes make that proportional
+to what changed.
+
+Reserving a seq and writing the document are separate operations, so a write
+can become visible after a higher seq has been committed. Reservations are
+therefore recorded in `sync_pending` on the user document until the write is
+done (released through versioning.bump_version); sync only hands out tokens
+below the oldest pending reservation. A reservation whose write never finished
+stops holding tokens back after PENDING_TIMEOUT_SECONDS.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo import ReturnDocument
+from .db import db
+
+SYNC_COLLECTIONS = ("grocery", "meals", "weights", "daily_logs")
+TOMBSTONES_COLLECTION = "tombstones"
+PENDING_TIMEOUT_SECONDS = 60
+
+
+async def reserve_seq(user_id, count: int = 1) -> int:
+    """
+    Reserve `count` consecutive seqs for writes about to happen and return the
+    first. Pass it to bump_version(..., release_seq=...) once the write is done.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+    user = await db.users.find_one_and_update(
+        {"_id": user_id},
+        [
+            {"$set": {"sync_seq": {"$add": [{"$ifNull": ["$sync_seq", 0]}, count]}}},
+            {"$set": {"sync_pending": {"$concatArrays": [
+                {"$filter": {"input": {"$ifNull": ["$sync_pending", []]}, "cond": {"$gt": ["$$this.at", stale]}}},
+                [{"seq": {"$subtract": ["$sync_seq", count - 1]}, "at": now}],
+            ]}}},
+        ],
+        projection={"sync_seq": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return user["sync_seq"] - count + 1
+
+
+def safe_seq(user: dict, now: Optional[datetime] = None) -> int:
+    """Highest seq below which every reserved write has completed, from an already loaded user document."""
+    stale = (now or datetime.utcnow()) - timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+    pending = [p["seq"] for p in user.get("sync_pending", []) if p["at"] > stale]
+    return min(pending) - 1 if pending else user.get("sync_seq", 0)
+
+
+async def record_deletes(user_id, collection: str, doc_ids, first_seq: int) -> None:
+    """Tombstones for deleted documents, numbered from `first_seq`."""
+    now = datetime.utcnow()
+    await db[TOMBSTONES_COLLECTION].insert_many([
+        {"user_id": user_id, "seq": first_seq + i, "collection": collection, "doc_id": doc_id, "deletedAt": now}
+        for i, doc_id in enumerate(doc_ids)
+    ])
+
+
+def encode_token(user_id, seq: int, issued: datetime) -> str:
+    """Opaque sync token; it only ever applies to the user it was issued to."""
+    return f"{user_id}.{seq}.{int(issued.replace(tzinfo=timezone.utc).timestamp())}"
+
+
+def decode_token(token: str):
+    """(user id string, seq, issued) from a token; raises ValueError for anything malformed."""
+    user_id, seq, issued = token.split(".")
+    try:
+        return user_id, int(seq), datetime.utcfromtimestamp(int(issued))
+    except (OverflowError, OSError) as e:
+        raise ValueError(token) from e
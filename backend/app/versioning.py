@@ -0,0 +1,50 @@
+# app/versioning.py
+"""
+Per-user collection version counters for conditional GETs.
+
+Every write to a versioned collection increments `versions.<collection>` on
+the user document. Read routes build their ETag from that counter. The user
+document is already loaded by get_current_user, so a request that can be
+answered with 304 never touches the collection itself.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from .db import db
+
+VERSIONED_COLLECTIONS = ("grocery", "goals", "meal_plans", "daily_logs")
+
+
+async def bump_version(user_id, *collections: str, release_seq: Optional[int] = None) -> None:
+    """
+    Call after a write has completed, never before. `release_seq` is the first
+    seq returned by sync.reserve_seq() for that write; releasing it in the same
+    update lets GET /sync hand out tokens past it.
+    """
+    update = {}
+    if collections:
+        update["$inc"] = {f"versions.{c}": 1 for c in collections}
+    if release_seq is not None:
+        update["$pull"] = {"sync_pending": {"seq": release_seq}}
+    if update:
+        await db.users.update_one({"_id": user_id}, update)
+
+
+def version_etag(user: dict, collection: str, *variant) -> str:
+    """Weak ETag for one user's view of a collection; `variant` covers query parameters."""
+    version = user.get("versions", {}).get(collection, 0)
+    raw = ":".join(str(part) for part in (user["_id"], collection, version, *variant))
+    return 'W/"' + hashlib.blake2b(raw.encode(), digest_size=8).hexdigest() + '"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Sets the ETag on `response` and returns a bodiless 304 if the client already
+    has this version; otherwise returns None and the route builds its body as usual.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
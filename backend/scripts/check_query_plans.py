@@ -0,0 +1,249 @@
+"""
+Query-plan regression check.
+
+Seeds a scratch database with several users' worth of data, creates the app's
+indexes with db_init.create_indexes(), and runs the queries behind each route
+through explain("executionStats"). A check fails when its winning plan contains
+a COLLSCAN, or when it examines more than --max-ratio documents per document
+returned. Exits non-zero on any failure, so it can gate CI:
+
+    python scripts/check_query_plans.py                 # MONGO_URI, scratch db "health_app_plan_check"
+    python scripts/check_query_plans.py --users 200 --max-ratio 2 --keep
+
+The scratch database is dropped afterwards unless --keep is given.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add backend folder to sys.path so 'app' can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DEFAULT_DB = "health_app_plan_check"
+MEAL_DESCRIPTIONS = [
+    "oatmeal with berries", "greek yogurt and honey", "chicken salad", "lentil soup",
+    "salmon with rice", "tofu stir fry", "turkey sandwich", "egg omelette", "pasta bolognese", "apple",
+]
+PANTRY = ["tomato", "chicken breast", "rice", "oat", "egg", "spinach", "milk", "lentil", "banana", "tofu"]
+
+
+def find(collection, filter, sort=None, projection=None, limit=None):
+    command = {"find": collection, "filter": filter}
+    if sort:
+        command["sort"] = sort
+    if projection:
+        command["projection"] = projection
+    if limit:
+        command["limit"] = limit
+    return command
+
+
+def aggregate(collection, pipeline):
+    return {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+
+
+def distinct(collection, key, query):
+    return {"distinct": collection, "key": key, "query": query}
+
+
+class Context:
+    """Values the route queries are parameterized with, for one seeded user."""
+
+    def __init__(self, user_id, email, now):
+        self.user_id = user_id
+        self.email = email
+        self.now = now
+        self.today_start = datetime.combine(now.date(), datetime.min.time())
+        self.today_end = self.today_start + timedelta(days=1) - timedelta(microseconds=1)
+        self.week_start = (now.date() - timedelta(days=now.weekday())).isoformat()
+
+
+# (name, builder, ratio checked). Ratios are skipped where the query layer
+# returns grouped rows, so examined/returned says nothing about the index.
+CHECKS = [
+    ("POST /auth/login", lambda c: find("users", {"email": c.email}, limit=1), True),
+    ("GET /meals/today, dashboard meals", lambda c: find(
+        "meals", {"user_id": c.user_id, "createdAt": {"$gte": c.today_start, "$lte": c.today_end}}), True),
+    ("GET /meals/recent", lambda c: aggregate("meals", [
+        {"$match": {"user_id": c.user_id, "createdAt": {"$gte": c.now - timedelta(days=30)}, "nutrition": {"$exists": True}}},
+        {"$sort": {"createdAt": -1}},
+        {"$limit": 500},
+        {"$group": {"_id": "$description", "n": {"$sum": 1}}},
+    ]), False),
+    ("GET /daily-log, export daily_logs", lambda c: find("daily_logs", {"user_id": c.user_id}, sort={"date": 1}), True),
+    ("dashboard totals, calculate-macros", lambda c: find(
+        "daily_logs", {"user_id": c.user_id, "date": c.today_start}, limit=1), True),
+    ("suggest-day recent macros", lambda c: find(
+        "daily_logs", {"user_id": c.user_id}, sort={"date": -1}, limit=7), True),
+    ("GET /weights, weight trend", lambda c: find("weights", {"user_id": c.user_id}), True),
+    ("latest weight", lambda c: find("weights", {"user_id": c.user_id}, sort={"createdAt": -1}, limit=1), True),
+    ("GET /goals, dashboard goal", lambda c: find("goals", {"user_id": c.user_id}, limit=1), True),
+    ("GET /grocery?status=", lambda c: find("grocery", {"user_id": c.user_id, "status": "in_stock"}), True),
+    ("dashboard pantry", lambda c: find("grocery", {"user_id": c.user_id, "status": {"$in": ["in_stock", "to_buy"]}}), True),
+    ("meal-plan pantry", lambda c: find(
+        "grocery", {"user_id": c.user_id, "status": "in_stock"}, sort={"createdAt": -1}, projection={"name": 1}), True),
+    ("load_pantry (POST /grocery, suggest-day)", lambda c: find(
+        "grocery", {"user_id": c.user_id}, sort={"createdAt": -1}, projection={"name": 1, "food_id": 1, "status": 1}), True),
+    ("suggest-day shopping-list upsert", lambda c: find("grocery", {"user_id": c.user_id, "food_id": "tomato"}), True),
+    ("GET /meal-plans/{week}", lambda c: find("meal_plans", {"user_id": c.user_id, "weekStart": c.week_start}, limit=1), True),
+    ("pre-generation planned users", lambda c: distinct(
+        "meal_plans", "user_id", {"weekStart": c.week_start, "user_id": {"$in": [c.user_id]}}), True),
+    ("pre-generation active users", lambda c: aggregate("daily_logs", [
+        {"$match": {"date": {"$gte": c.today_start - timedelta(days=14)}}},
+        {"$group": {"_id": "$user_id"}},
+    ]), False),
+    ("GET /activity", lambda c: find(
+        "activity", {"user_id": c.user_id, "createdAt": {"$gte": c.now - timedelta(days=7), "$lte": c.now}},
+        sort={"createdAt": 1}), True),
+    ("GET /activity/daily", lambda c: aggregate("activity", [
+        {"$match": {"user_id": c.user_id, "createdAt": {"$gte": c.now - timedelta(days=7), "$lte": c.now}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$createdAt"}}, "steps": {"$sum": "$steps"}}},
+    ]), False),
+    ("archive: history meals", lambda c: find("meals_archive", {"user_id": c.user_id}, sort={"createdAt": 1}), True),
+    ("archive: history daily_logs", lambda c: find("daily_logs_archive", {"user_id": c.user_id}, sort={"date": 1}), True),
+    ("archive job: meals scan", lambda c: find(
+        "meals", {"createdAt": {"$lt": c.today_start - timedelta(days=20)}}, sort={"createdAt": 1}, limit=1000), True),
+    ("archive job: daily_logs scan", lambda c: find(
+        "daily_logs", {"date": {"$lt": c.today_start - timedelta(days=20)}}, sort={"date": 1}, limit=1000), True),
+]
+
+
+async def seed(db, users: int, days: int, now: datetime):
+    """A few weeks of meals, logs, weights, activity, pantry and plans for each user."""
+    rng = random.Random(42)
+    user_docs, meals, logs, weights, activity, grocery, plans, goals = [], [], [], [], [], [], [], []
+    meals_archive, logs_archive = [], []
+    week_start = now.date() - timedelta(days=now.weekday())
+    for i in range(users):
+        user = {"email": f"user{i}@example.com", "createdAt": now}
+        user_docs.append(user)
+    result = await db.users.insert_many(user_docs)
+    for user_id in result.inserted_ids:
+        goals.append({"user_id": user_id, "goal_type": "weight loss", "target_weight": 70})
+        for day in range(days):
+            date = datetime.combine(now.date() - timedelta(days=day), datetime.min.time())
+            totals = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "fiber": 0.0}
+            for meal_type in ("breakfast", "lunch", "dinner"):
+                nutrition = {k: float(rng.randint(1, 600)) for k in totals}
+                for k in totals:
+                    totals[k] += nutrition[k]
+                meals.append({
+                    "user_id": user_id, "meal_type": meal_type, "description": rng.choice(MEAL_DESCRIPTIONS),
+                    "nutrition": nutrition, "createdAt": date + timedelta(hours=rng.randint(6, 21)),
+                })
+            logs.append({"user_id": user_id, "date": date, "totals": totals})
+            weights.append({"user_id": user_id, "weight": 70 + rng.random() * 10, "measuredAt": date.isoformat(), "createdAt": date})
+            activity.append({"user_id": user_id, "type": "walk", "steps": rng.randint(1000, 12000), "duration": 30,
+                             "createdAt": date + timedelta(hours=12)})
+        old = datetime.combine(now.date() - timedelta(days=days + 200), datetime.min.time())
+        meals_archive.append({"user_id": user_id, "meal_type": "lunch", "description": "apple", "nutrition": {}, "createdAt": old})
+        logs_archive.append({"user_id": user_id, "date": old, "totals": {"calories": 100.0}})
+        for j, name in enumerate(PANTRY):
+            grocery.append({"user_id": user_id, "name": name, "name_lower": name, "food_id": name.replace(" ", "_"),
+                            "status": "in_stock" if j % 2 else "to_buy", "createdAt": now - timedelta(days=j)})
+        for week in range(3):
+            plans.append({"user_id": user_id, "weekStart": (week_start - timedelta(weeks=week)).isoformat(), "meals": [],
+                          "version": 1, "createdAt": now, "expiresAt": now + timedelta(days=7)})
+
+    for name, docs in (
+        ("goals", goals), ("meals", meals), ("daily_logs", logs), ("weights", weights), ("activity", activity),
+        ("grocery", grocery), ("meal_plans", plans), ("meals_archive", meals_archive), ("daily_logs_archive", logs_archive),
+    ):
+        await db[name].insert_many(docs, ordered=False)
+    return result.inserted_ids
+
+
+def _walk(node, key):
+    """Every value stored under `key` anywhere inside `node`."""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                yield v
+            yield from _walk(v, key)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item, key)
+
+
+def analyze(explain: dict):
+    """Stages and index names of the winning plan(s), plus (examined, returned)."""
+    stages, indexes = set(), set()
+    for plan in _walk(explain, "winningPlan"):
+        stages.update(_walk(plan, "stage"))
+        indexes.update(_walk(plan, "indexName"))
+    stats = next(_walk(explain, "executionStats"), {})
+    return stages, indexes, stats.get("totalDocsExamined", 0), stats.get("nReturned", 0)
+
+
+async def check(db, contexts, max_ratio: float) -> int:
+    failures = 0
+    for name, build, check_ratio in CHECKS:
+        # Any failing sample fails the check: a COLLSCAN in one sample is not
+        # hidden by another, and the reported ratio is the worst one seen.
+        collscan, indexes, worst = False, set(), None
+        for context in contexts:
+            explain = await db.command({"explain": build(context), "verbosity": "executionStats"})
+            stages, sample_indexes, examined, returned = analyze(explain)
+            ratio = examined / max(returned, 1)
+            collscan = collscan or "COLLSCAN" in stages
+            indexes |= sample_indexes
+            if worst is None or ratio > worst[2]:
+                worst = (examined, returned, ratio)
+        examined, returned, ratio = worst
+        problems = ["COLLSCAN"] if collscan else []
+        if check_ratio and ratio > max_ratio:
+            problems.append(f"examined/returned {ratio:.1f} > {max_ratio}")
+        failures += bool(problems)
+        mark = "❌" if problems else "✅"
+        index_list = ", ".join(sorted(indexes)) or "-"
+        print(f"{mark} {name:<42} examined={examined:<6} returned={returned:<6} index={index_list}")
+        for problem in problems:
+            print(f"     {problem}")
+    return failures
+
+
+async def main(args):
+    # Imported after MONGO_DB is pointed at the scratch database.
+    from app.db import client, db
+    from app.db_init import create_indexes, ensure_activity_timeseries
+
+    now = datetime.utcnow()
+    await client.drop_database(args.db)
+    try:
+        # Same order as app startup: the time-series collection first, then indexes.
+        await ensure_activity_timeseries()
+        await create_indexes()
+        user_ids = await seed(db, args.users, args.days, now)
+        users = {doc["_id"]: doc["email"] async for doc in db.users.find({"_id": {"$in": user_ids[:args.sample]}})}
+        contexts = [Context(user_id, email, now) for user_id, email in users.items()]
+        print(f"🔎 Explaining {len(CHECKS)} queries for {len(contexts)} of {args.users} seeded users\n")
+        failures = await check(db, contexts, args.max_ratio)
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+    print(f"\n{'❌' if failures else '✅'} {failures} of {len(CHECKS)} queries failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail on collection scans and wasteful query plans.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Scratch database to seed (dropped before and after)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30, help="Days of history seeded per user")
+    parser.add_argument("--sample", type=int, default=5, help="Users whose queries are explained")
+    parser.add_argument("--max-ratio", type=float, default=3.0, help="Highest allowed docs examined per doc returned")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database for inspection")
+    args = parser.parse_args()
+
+    # Settings read .env too; check the database it names before overriding it.
+    load_dotenv()
+    configured = os.environ.get("MONGO_DB")
+    if configured and configured == args.db:
+        parser.error("--db must not be the application database; it is dropped")
+    os.environ["MONGO_DB"] = args.db
+    sys.exit(asyncio.run(main(args)))
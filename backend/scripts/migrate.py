@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+
+# Add backend folder to sys.path so 'app' can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.db import db  # Only import db, nothing else from app
+from migrations import MIGRATIONS_COLLECTION, all_migrations, run_migration
+
+
+async def show_status():
+    for migration in all_migrations():
+        state = await db[MIGRATIONS_COLLECTION].find_one({"_id": migration.version}) or {}
+        status = state.get("status", "pending")
+        print(f"{migration.version} {migration.name:<28} {status:<8} processed={state.get('processed', 0)}")
+
+
+async def migrate(only=None, batch_size=500, max_rate=None, dry_run=False):
+    """Run every pending migration in version order, or just the ones listed in `only`."""
+    for migration in all_migrations():
+        if only and migration.version not in only and migration.name not in only:
+            continue
+        await run_migration(db, migration, batch_size=batch_size, max_rate=max_rate, dry_run=dry_run)
+    print("\n✅ Migration complete!" if not dry_run else "\n🔎 Dry run complete, nothing was written.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run batched, resumable data migrations.")
+    parser.add_argument("only", nargs="*", help="Versions or names to run (default: all pending)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-rate", type=float, default=None, help="Documents per second ceiling")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the documents each migration would touch")
+    parser.add_argument("--status", action="store_true", help="Show recorded migration state and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        asyncio.run(show_status())
+    else:
+        asyncio.run(migrate(args.only, args.batch_size, args.max_rate, args.dry_run))
@@ -0,0 +1,12 @@
+import asyncio
+from pathlib import Path
+import sys
+
+# Add backend folder to sys.path so 'app' can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from migrate import migrate
+
+if __name__ == "__main__":
+    # Kept for existing runbooks; this is migration 0002 in scripts/migrate.py.
+    asyncio.run(migrate(only=["0002"]))
@@ -0,0 +1,127 @@
+# backend/scripts/migrations/__init__.py
+"""
+Batched, resumable data migrations.
+
+Each migration walks its collection in `_id` order, one batch at a time, and
+checkpoints the last processed `_id` in the `migrations` collection after every
+batch. A crashed run picks up from that checkpoint. Batches are throttled to a
+documents-per-second limit so a migration can run against a live primary.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional
+from pymongo import ASCENDING
+
+MIGRATIONS_COLLECTION = "migrations"
+
+
+class Migration:
+    """
+    Base class for a versioned migration. Subclasses set `version`, `name`,
+    `collection` and `query`, and implement `update()` (returning a pymongo
+    write op for a document, or None to skip it) or override `apply_batch()`.
+    """
+    version: str = ""
+    name: str = ""
+    collection: str = ""
+    query: dict = {}
+    projection: Optional[dict] = None
+
+    async def prepare(self, db, dry_run: bool):
+        """Hook run once before batching starts (e.g. creating collections)."""
+
+    def update(self, doc: dict):
+        raise NotImplementedError
+
+    async def apply_batch(self, db, docs: List[dict]) -> int:
+        ops = [op for op in (self.update(doc) for doc in docs) if op is not None]
+        if ops:
+            await db[self.collection].bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async def count_pending(self, db) -> int:
+        return await db[self.collection].count_documents(self.query)
+
+
+async def get_state(db, migration: Migration) -> Optional[dict]:
+    return await db[MIGRATIONS_COLLECTION].find_one({"_id": migration.version})
+
+
+async def run_migration(db, migration: Migration, batch_size: int = 500, max_rate: Optional[float] = None, dry_run: bool = False):
+    """
+    Apply one migration in `_id`-ordered batches of `batch_size`, sleeping as
+    needed to stay under `max_rate` documents per second.
+    """
+    state = await get_state(db, migration)
+    label = f"{migration.version} {migration.name}"
+    if state and state.get("status") == "done":
+        print(f"✅ {label}: already applied on {state.get('finished_at')}")
+        return
+
+    await migration.prepare(db, dry_run)
+    pending = await migration.count_pending(db)
+    if dry_run:
+        resume = f" (resuming after _id {state['last_id']})" if state and state.get("last_id") else ""
+        print(f"🔎 {label}: {pending} documents to migrate{resume}")
+        return
+
+    last_id = state.get("last_id") if state else None
+    processed = state.get("processed", 0) if state else 0
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": migration.version},
+        {"$set": {"name": migration.name, "status": "running"},
+         "$setOnInsert": {"started_at": datetime.utcnow(), "processed": 0}},
+        upsert=True,
+    )
+    print(f"🚚 {label}: {pending} documents to migrate" + (f", resuming after _id {last_id}" if last_id else ""))
+
+    started = time.monotonic()
+    run_processed = 0
+    while True:
+        query = dict(migration.query)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = db[migration.collection].find(query, migration.projection).sort("_id", ASCENDING).limit(batch_size)
+        docs = await cursor.to_list(length=batch_size)
+        if not docs:
+            break
+
+        batch_started = time.monotonic()
+        written = await migration.apply_batch(db, docs)
+        last_id = docs[-1]["_id"]
+        processed += written
+        run_processed += written
+        await db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": migration.version},
+            {"$set": {"last_id": last_id, "processed": processed, "updated_at": datetime.utcnow()}},
+        )
+
+        elapsed = time.monotonic() - started
+        rate = run_processed / elapsed if elapsed else 0.0
+        print(f"   … {run_processed}/{pending} documents ({rate:.0f} docs/s)")
+
+        if max_rate:
+            # Sleep off whatever the batch finished ahead of the rate limit.
+            wait = len(docs) / max_rate - (time.monotonic() - batch_started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": migration.version},
+        {"$set": {"status": "done", "finished_at": datetime.utcnow()}},
+    )
+    print(f"✅ {label}: {run_processed} documents migrated in {time.monotonic() - started:.1f}s")
+
+
+def all_migrations() -> List[Migration]:
+    """Registered migrations, in version order."""
+    from .m0001_meals_created_at import MealsCreatedAt
+    from .m0002_activity_timeseries import ActivityTimeseries
+    from .m0003_grocery_food_id import GroceryFoodId
+    from .m0004_meal_plans_expires_at import MealPlansExpiresAt
+    from .m0005_sync_seq import SyncSeq
+    return sorted(
+        [MealsCreatedAt(), ActivityTimeseries(), GroceryFoodId(), MealPlansExpiresAt(), SyncSeq()],
+        key=lambda m: m.version,
+    )
@@ -0,0 +1,23 @@
+# backend/scripts/migrations/m0001_meals_created_at.py
+from pymongo import UpdateOne
+from . import Migration
+
+
+class MealsCreatedAt(Migration):
+    """
+    Add `createdAt` to legacy meals. The timestamp comes from each document's
+    ObjectId, so every meal keeps its real insertion time instead of all of
+    them sharing the moment the migration ran.
+    """
+    version = "0001"
+    name = "meals_created_at"
+    collection = "meals"
+    query = {"createdAt": {"$exists": False}}
+    projection = {"_id": 1}
+
+    def update(self, doc):
+        created_at = doc["_id"].generation_time.replace(tzinfo=None)
+        return UpdateOne(
+            {"_id": doc["_id"], "createdAt": {"$exists": False}},
+            {"$set": {"createdAt": created_at}},
+        )
@@ -0,0 +1,50 @@
+# backend/scripts/migrations/m0002_activity_timeseries.py
+from pymongo.errors import BulkWriteError
+from app.db_init import ensure_activity_timeseries
+from . import Migration
+
+LEGACY_NAME = "activity_legacy"
+
+
+class ActivityTimeseries(Migration):
+    """
+    Convert a regular `activity` collection into a time-series one: rename it
+    to `activity_legacy`, recreate `activity` as time-series and copy the
+    documents across in batches. The legacy collection is left in place; drop
+    it once the copy is verified.
+    """
+    version = "0002"
+    name = "activity_timeseries"
+    collection = LEGACY_NAME
+    query = {"createdAt": {"$exists": True}}
+
+    async def prepare(self, db, dry_run):
+        names = await db.list_collection_names()
+        options = await db.activity.options()
+        if dry_run and "activity" in names and "timeseries" not in options:
+            # Nothing renamed yet; count what the real run would copy.
+            self.collection = "activity"
+            return
+        if "activity" in names and "timeseries" not in options:
+            await db.activity.rename(LEGACY_NAME)
+            print(f"📦 Renamed 'activity' to '{LEGACY_NAME}'")
+        await ensure_activity_timeseries()
+
+    async def apply_batch(self, db, docs):
+        # Time-series collections do not enforce unique _ids: skip what a run
+        # that crashed before its checkpoint already copied. The user and time
+        # bounds let the lookup prune buckets instead of scanning them all.
+        times = [doc["createdAt"] for doc in docs]
+        copied = set(await db.activity.distinct("_id", {
+            "user_id": {"$in": list({doc.get("user_id") for doc in docs})},
+            "createdAt": {"$gte": min(times), "$lte": max(times)},
+            "_id": {"$in": [doc["_id"] for doc in docs]},
+        }))
+        docs = [doc for doc in docs if doc["_id"] not in copied]
+        if not docs:
+            return 0
+        try:
+            await db.activity.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+        return len(docs)
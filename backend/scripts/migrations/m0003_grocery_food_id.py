@@ -0,0 +1,16 @@
+# backend/scripts/migrations/m0003_grocery_food_id.py
+from pymongo import UpdateOne
+from app.services.ingredients import food_id
+from . import Migration
+
+
+class GroceryFoodId(Migration):
+    """Backfill the canonical `food_id` on grocery documents written before normalization."""
+    version = "0003"
+    name = "grocery_food_id"
+    collection = "grocery"
+    query = {"food_id": {"$exists": False}}
+    projection = {"name": 1}
+
+    def update(self, doc):
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {"food_id": food_id(doc["name"])}})
@@ -0,0 +1,20 @@
+# backend/scripts/migrations/m0004_meal_plans_expires_at.py
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from . import Migration
+
+
+class MealPlansExpiresAt(Migration):
+    """
+    Give plans written before per-document expiry the `expiresAt` the old
+    24h TTL index on `createdAt` would have applied.
+    """
+    version = "0004"
+    name = "meal_plans_expires_at"
+    collection = "meal_plans"
+    query = {"expiresAt": {"$exists": False}}
+    projection = {"createdAt": 1}
+
+    def update(self, doc):
+        created = doc.get("createdAt") or datetime.utcnow()
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {"expiresAt": created + timedelta(days=1)}})
@@ -0,0 +1,42 @@
+# backend/scripts/migrations/m0005_sync_seq.py
+from pymongo import ASCENDING, UpdateOne
+from app.services.archive import TIERS
+from app.sync import SYNC_COLLECTIONS, reserve_seq
+from app.versioning import bump_version
+from . import Migration
+
+
+class SyncSeq(Migration):
+    """
+    Stamp documents written before delta sync with a `seq`, so a client's first
+    GET /sync (without a token) returns them. Walks users; each user's unstamped
+    documents get a fresh block of seqs, in `_id` order per collection.
+    """
+    version = "0005"
+    name = "sync_seq"
+    collection = "users"
+    query = {}
+    projection = {"_id": 1}
+
+    async def apply_batch(self, db, docs):
+        for user in docs:
+            for collection in SYNC_COLLECTIONS:
+                names = [collection] + ([TIERS[collection][0]] if collection in TIERS else [])
+                for name in names:
+                    await self._stamp(db, name, user["_id"])
+        return len(docs)
+
+    async def _stamp(self, db, collection, user_id):
+        query = {"user_id": user_id, "seq": {"$exists": False}}
+        ids = [doc["_id"] async for doc in db[collection].find(query, {"_id": 1}).sort("_id", ASCENDING)]
+        if not ids:
+            return
+        first = await reserve_seq(user_id, len(ids))
+        try:
+            await db[collection].bulk_write(
+                [UpdateOne({"_id": doc_id, "seq": {"$exists": False}}, {"$set": {"seq": first + i}})
+                 for i, doc_id in enumerate(ids)],
+                ordered=False,
+            )
+        finally:
+            await bump_version(user_id, release_seq=first)
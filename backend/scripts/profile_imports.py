@@ -0,0 +1,45 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def profile_imports(module: str, top: int):
+    """
+    Import `module` in a fresh interpreter with `-X importtime` and print
+    the slowest modules by cumulative import time.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr)
+        sys.exit(proc.returncode)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+
+    total = next((cum for cum, _, name in rows if name == module), 0)
+    print(f"⏱  import {module}: {total / 1000:.1f} ms total\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the slowest imports at application startup.")
+    parser.add_argument("module", nargs="?", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    profile_imports(args.module, args.top)
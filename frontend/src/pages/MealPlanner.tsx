@@ -2,6 +2,8 @@
 import React, { useEffect, useState } from "react";
 import Navbar from "../components/Navbar";
 import { dailyLogService } from "../services/dailyLogService";
+import { dashboardService } from "../services/dashboardService";
+import { eventsService } from "../services/eventsService";
 import { mealService } from "../services/mealService";
 import { pantryService } from "../services/pantryService";
 import type { PantryItem } from "../services/pantryService";
@@ -26,18 +28,11 @@ const MealPlanner: React.FC = () => {
   // --- Data Fetching ---
   const fetchTodaysData = async () => {
     try {
-      const today = new Date().toISOString().slice(0, 10);
-      
-      const [logs, todaysMeals, inStock, toBuy] = await Promise.all([
-        dailyLogService.getLogs(),
-        mealService.getTodaysMeals(),
-        pantryService.list("in_stock"),
-        pantryService.list("to_buy"),
-      ]);
-
-      const todayLog = (logs || []).find((l: any) => l.date && l.date.startsWith(today));
-      if (todayLog && todayLog.totals) {
-        setMacros(todayLog.totals);
+      // One request for everything this page renders.
+      const { totals, meals: todaysMeals, pantry } = await dashboardService.getToday(["totals", "meals", "pantry"]);
+
+      if (totals) {
+        setMacros(totals);
       }
       
       if (todaysMeals && todaysMeals.length > 0) {
@@ -50,15 +45,41 @@ const MealPlanner: React.FC = () => {
         setMeals(mealInputs);
       }
       
-      setPantryItems([...(inStock || []), ...(toBuy || [])]);
+      setPantryItems([...(pantry?.in_stock || []), ...(pantry?.to_buy || [])]);
 
     } catch (err) {
       console.error("Error loading today's data:", err);
     }
   };
 
+  const fetchPantry = async () => {
+    try {
+      const [inStock, toBuy] = await Promise.all([pantryService.list("in_stock"), pantryService.list("to_buy")]);
+      setPantryItems([...inStock, ...toBuy]);
+    } catch (err) {
+      console.error("Error loading pantry:", err);
+    }
+  };
+
+  const upsertPantryItem = (item: PantryItem) =>
+    setPantryItems((items) => [...items.filter((i) => i._id !== item._id), item]);
+
+  const removePantryItem = (id: string) =>
+    setPantryItems((items) => items.filter((i) => i._id !== id));
+
   useEffect(() => {
     fetchTodaysData();
+    // Our own writes are applied from their responses; events keep this page in
+    // sync with changes made on other devices. With EVENTS_BACKEND=memory they
+    // only reach streams on the same server worker, so they are best effort.
+    return eventsService.subscribe({
+      onDailyTotals: ({ totals }) => setMacros(totals),
+      onPantryItem: (event) => {
+        if (event.action === "delete") removePantryItem(event._id);
+        else upsertPantryItem(event.item);
+      },
+      onResync: () => fetchTodaysData(),
+    });
   }, []);
 
   // --- Logic ---
@@ -95,8 +116,8 @@ const MealPlanner: React.FC = () => {
         dinner: suggestedMeals.dinner || "",
         snacks: "",
       });
-      // After suggesting, refresh the pantry list to see any new "to_buy" items
-      fetchTodaysData();
+      // The suggestion may have added "to_buy" items
+      await fetchPantry();
     } catch (err) {
       console.error("Error suggesting meals:", err);
       alert("Could not get meal suggestions. Please try again.");
@@ -108,9 +129,10 @@ const MealPlanner: React.FC = () => {
   // --- PANTRY HANDLERS (UPDATED) ---
   const handleAddItem = async (name: string, status: 'in_stock' | 'to_buy') => {
     try {
-      await pantryService.add({ name, status });
-      fetchTodaysData(); // Re-fetch all data to refresh the list
+      upsertPantryItem(await pantryService.add({ name, status }));
     } catch (err) {
+      // The write may have happened even if the response failed; show what the server has.
+      await fetchPantry();
       alert("Could not add the item. It might already be on your list.");
     }
   };
@@ -118,8 +140,9 @@ const MealPlanner: React.FC = () => {
   const handleDeleteItem = async (id: string) => {
     try {
       await pantryService.delete(id);
-      fetchTodaysData(); // Re-fetch all data to refresh the list
+      removePantryItem(id);
     } catch (err) {
+      await fetchPantry();
       alert("Could not delete the item.");
     }
   };
@@ -1,6 +1,7 @@
 // frontend/src/services/authService.ts
 import axios from "axios";
 import { API_BASE_URL } from "./apiConfig";
+import { syncService } from "./syncService";
 
 export const authService = {
   register: async (data: any) => {
@@ -23,6 +24,7 @@ export const authService = {
 
   logout: () => {
     localStorage.removeItem("token");
+    syncService.clear();
   },
 
   getToken: () => {
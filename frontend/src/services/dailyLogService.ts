@@ -36,6 +36,14 @@ export const dailyLogService = {
     return res.data;
   },
 
+  // Logs past meals / favorites again with their stored macros; no AI estimate.
+  relog: async (selection: { meal_ids?: string[]; favorite_ids?: string[]; meal_type?: string }) => {
+    const res = await axios.post(`${API_BASE_URL}/daily-log/relog`, selection, {
+      headers: auth(),
+    });
+    return res.data;
+  },
+
   getLogs: async () => {
     // Corrected URL to match the backend prefix
     const res = await axios.get(`${API_BASE_URL}/daily-log`, {
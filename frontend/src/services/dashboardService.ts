@@ -0,0 +1,34 @@
+// frontend/src/services/dashboardService.ts
+import axios from "axios";
+import { API_BASE_URL } from "./apiConfig";
+import type { PantryItem } from "./pantryService";
+
+export type DashboardField = "totals" | "meals" | "pantry" | "weight" | "goal";
+
+export type TodayDashboard = {
+  date: string;
+  totals?: { calories: number; protein: number; carbs: number; fat: number; fiber: number } | null;
+  meals?: { _id: string; meal_type: string; description: string }[];
+  pantry?: { in_stock: PantryItem[]; to_buy: PantryItem[] };
+  weight?: { weight: number; measuredAt: string } | null;
+  goal?: { goal_type: string; target_weight?: number; target_date?: string } | null;
+};
+
+const auth = () => {
+  const token = localStorage.getItem("token");
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
+export const dashboardService = {
+  /**
+   * Fetches today's totals, meals, pantry, latest weight and goal in a single request.
+   * Pass `fields` to fetch only what the page renders.
+   */
+  async getToday(fields?: DashboardField[]): Promise<TodayDashboard> {
+    const params = fields ? { fields: fields.join(",") } : {};
+    const res = await axios.get(`${API_BASE_URL}/dashboard/today`, { headers: auth(), params });
+    return res.data;
+  },
+};
+
+export default dashboardService;
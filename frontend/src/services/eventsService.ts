@@ -0,0 +1,37 @@
+// frontend/src/services/eventsService.ts
+import { API_BASE_URL } from "./apiConfig";
+import type { PantryItem } from "./pantryService";
+
+type Macros = { calories: number; protein: number; carbs: number; fat: number; fiber: number };
+
+export type LiveEventHandlers = {
+  onDailyTotals?: (data: { date: string; totals: Macros; meals: { _id: string; meal_type: string; description: string }[] }) => void;
+  onPantryItem?: (data: { action: "upsert"; item: PantryItem } | { action: "delete"; _id: string }) => void;
+  onWeight?: (data: { _id: string; weight: number; measuredAt: string }) => void;
+  // The server dropped events for this connection; refetch full state.
+  onResync?: () => void;
+};
+
+export const eventsService = {
+  /**
+   * Opens the per-user event stream. EventSource reconnects on its own and sends
+   * Last-Event-ID, so missed events are replayed. Returns a function that closes it.
+   */
+  subscribe(handlers: LiveEventHandlers): () => void {
+    const token = localStorage.getItem("token");
+    if (!token || typeof EventSource === "undefined") return () => {};
+
+    // EventSource cannot set headers, so the token travels as a query parameter.
+    const source = new EventSource(`${API_BASE_URL}/events/stream?access_token=${encodeURIComponent(token)}`);
+    const on = (type: string, handler?: (data: any) => void) => {
+      if (handler) source.addEventListener(type, (e) => handler(JSON.parse((e as MessageEvent).data)));
+    };
+    on("daily_totals", handlers.onDailyTotals);
+    on("pantry_item", handlers.onPantryItem);
+    on("weight", handlers.onWeight);
+    on("resync", handlers.onResync);
+    return () => source.close();
+  },
+};
+
+export default eventsService;
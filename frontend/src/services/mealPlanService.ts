@@ -3,6 +3,7 @@ import axios from "axios";
 import { API_BASE_URL } from "./apiConfig";
 
 export type PlannedMeal = {
+  meal_id?: string;
   date: string; // YYYY-MM-DD
   mealType: "breakfast" | "lunch" | "dinner" | "snack";
   templateId?: string | null;
@@ -13,6 +14,7 @@ export type PlannedMeal = {
 export type MealPlan = {
   _id: string;
   weekStart: string;
+  version: number;
   meals: PlannedMeal[];
   grocery: {
     name: string;
@@ -23,6 +25,11 @@ export type MealPlan = {
   }[];
 };
 
+export type MealOperation =
+  | { op: "add"; meal: PlannedMeal }
+  | { op: "replace"; meal_id?: string; index?: number; meal: PlannedMeal }
+  | { op: "remove"; meal_id?: string; index?: number };
+
 const auth = () => {
   const token = localStorage.getItem("token");
   return token ? { Authorization: `Bearer ${token}` } : {};
@@ -71,5 +78,15 @@ export const mealPlanService = {
     });
     return res.data;
   },
-};
 
+  // Apply targeted edits; rejects with 409 if the plan changed since `version`
+  async patchMeals(planId: string, version: number, operations: MealOperation[]): Promise<MealPlan> {
+    const url = `${API_BASE_URL}/meal-plans/${planId}/meals`;
+    const res = await axios.patch(
+      url,
+      { version, operations },
+      { headers: { ...auth(), "Content-Type": "application/json" } }
+    );
+    return res.data;
+  },
+};
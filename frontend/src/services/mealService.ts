@@ -3,6 +3,30 @@ import { API_BASE_URL } from "./apiConfig";
 
 const MEALS_URL = `${API_BASE_URL}/meals`;
 
+export type Nutrition = {
+  calories?: number;
+  protein?: number;
+  carbs?: number;
+  fat?: number;
+  fiber?: number;
+};
+
+export type RecentMeal = {
+  meal_id: string;
+  meal_type?: string | null;
+  description: string;
+  nutrition: Nutrition;
+  last_logged: string;
+  times_logged: number;
+};
+
+export type FavoriteMeal = {
+  favorite_id: string;
+  meal_type?: string | null;
+  description: string;
+  nutrition: Nutrition;
+};
+
 const authHeaders = () => {
   try {
     const t = typeof window !== "undefined" ? localStorage.getItem("token") : null;
@@ -30,6 +54,28 @@ export const mealService = {
     const res = await axios.post(url, {}, { headers: { ...authHeaders() } });
     return res.data;
   },
+
+  /**
+   * Distinct recently logged meals with their stored nutrition.
+   */
+  async getRecentMeals(days = 30, limit = 20): Promise<RecentMeal[]> {
+    const res = await axios.get(`${MEALS_URL}/recent`, { params: { days, limit }, headers: { ...authHeaders() } });
+    return res.data;
+  },
+
+  async getFavorites(): Promise<FavoriteMeal[]> {
+    const res = await axios.get(`${MEALS_URL}/favorites`, { headers: { ...authHeaders() } });
+    return res.data;
+  },
+
+  async addFavorite(mealId: string): Promise<FavoriteMeal> {
+    const res = await axios.post(`${MEALS_URL}/favorites`, { meal_id: mealId }, { headers: { ...authHeaders() } });
+    return res.data;
+  },
+
+  async removeFavorite(favoriteId: string): Promise<void> {
+    await axios.delete(`${MEALS_URL}/favorites/${favoriteId}`, { headers: { ...authHeaders() } });
+  },
 };
 
 export default mealService;
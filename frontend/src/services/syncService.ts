@@ -0,0 +1,66 @@
+// frontend/src/services/syncService.ts
+import axios from "axios";
+import { API_BASE_URL } from "./apiConfig";
+
+const TOKEN_PREFIX = "syncToken:";
+
+const auth = () => {
+  const token = localStorage.getItem("token");
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
+// The logged-in user's id (the JWT subject), so each user keeps their own sync token.
+const currentUserId = (): string | null => {
+  const token = localStorage.getItem("token");
+  if (!token) return null;
+  try {
+    const payload = token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/");
+    return JSON.parse(atob(payload)).sub ?? null;
+  } catch {
+    return null;
+  }
+};
+
+export type SyncCollection = "grocery" | "meals" | "weights" | "daily_logs";
+
+export type SyncPage = {
+  changes: Record<SyncCollection, any[]>;
+  deleted: { collection: SyncCollection; _id: string; seq: number }[];
+  token: string;
+  has_more: boolean;
+  // The stored token was too old, unknown or another user's: replace local data with this result.
+  reset: boolean;
+};
+
+export const syncService = {
+  /**
+   * Fetches everything changed since the user's last stored token, page by
+   * page, and hands each page to `apply` before storing the next token.
+   * Without a stored token the first pages are a full snapshot.
+   */
+  pull: async (apply: (page: SyncPage) => void | Promise<void>, limit = 500) => {
+    const userId = currentUserId();
+    if (!userId) return;
+    const key = TOKEN_PREFIX + userId;
+    let hasMore = true;
+    while (hasMore) {
+      const since = localStorage.getItem(key);
+      const res = await axios.get<SyncPage>(`${API_BASE_URL}/sync`, {
+        params: { limit, ...(since ? { since } : {}) },
+        headers: auth(),
+      });
+      await apply(res.data);
+      localStorage.setItem(key, res.data.token);
+      hasMore = res.data.has_more;
+    }
+  },
+
+  // Drops every stored sync token; called on logout.
+  clear: () => {
+    Object.keys(localStorage)
+      .filter((key) => key.startsWith(TOKEN_PREFIX))
+      .forEach((key) => localStorage.removeItem(key));
+  },
+};
+
+export default syncService;